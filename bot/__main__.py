@@ -1,14 +1,42 @@
 import os
 import logging
+import threading
+import time
 from telegram import Update
 from telegram.ext import Application, ContextTypes, TypeHandler
 
 from bot.commands import register
+from bot.commands.yt import resume_jobs
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _warm_up(delay_sec: float) -> None:
+    # Let the webhook come up first; the imports compete for the GIL
+    time.sleep(delay_sec)
+    started = time.perf_counter()
+    try:
+        from bot.commands.yt import warm_up_imports
+
+        warm_up_imports()
+    except Exception:
+        logger.exception("Warm-up failed")
+        return
+    logger.info("Warm-up imports done in %.2fs", time.perf_counter() - started)
+
+
+async def _post_init(app: Application) -> None:
+    """Resume interrupted jobs once the app is running; with WARMUP_IMPORTS=1, preload /yt
+    dependencies in a background thread."""
+    # post_init runs before the application starts; tasks created now would not be tracked
+    app.job_queue.run_once(resume_jobs, 0, name="resume-jobs")
+    if os.environ.get("WARMUP_IMPORTS", "").strip().lower() not in ("1", "true", "yes"):
+        return
+    delay = float(os.environ.get("WARMUP_DELAY_SEC", "3") or 0)
+    threading.Thread(target=_warm_up, args=(delay,), daemon=True, name="warm-up").start()
+
+
 def main() -> None:
     token = os.environ.get("BOT_TOKEN")
     webhook_url = os.environ.get("WEBHOOK_URL")
@@ -21,7 +49,7 @@ def main() -> None:
     port = int(os.environ.get("PORT", "8080"))
     webhook_full = f"{webhook_url.rstrip('/')}/webhook"
     logger.info("Starting bot with webhook %s (port %s)", webhook_full, port)
-    app = Application.builder().token(token).build()
+    app = Application.builder().token(token).post_init(_post_init).build()
 
     register(app)
 
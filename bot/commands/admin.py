@@ -0,0 +1,135 @@
+"""Admin commands: /stats and /queue. Admins are listed in ADMIN_USER_IDS (comma-separated)."""
+
+import asyncio
+import os
+import time
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from bot import metrics
+from bot.commands.yt import _format_progress
+from bot.stores.processing_store import get_all as processing_get_all
+
+ADMIN_USER_IDS = {
+    int(x) for x in os.environ.get("ADMIN_USER_IDS", "").replace(" ", "").split(",") if x.isdigit()
+}
+
+# Stage timers shown by /stats, in pipeline order
+STAGES = (
+    ("download", "Download"),
+    ("tts.synthesize", "TTS request"),
+    ("tts.decode", "Decode"),
+    ("tts.stretch", "Stretch"),
+    ("tts.block", "Block total"),
+    ("mux", "Mux"),
+    ("dub", "Dub (all tracks)"),
+)
+
+
+def is_admin(user_id: int) -> bool:
+    return user_id in ADMIN_USER_IDS
+
+
+def _fmt_sec(sec: float) -> str:
+    if sec < 1:
+        return f"{sec * 1000:.0f} ms"
+    if sec < 120:
+        return f"{sec:.1f} s"
+    return f"{sec / 60:.1f} min"
+
+
+def _fmt_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except OSError:
+            continue
+        for e in entries:
+            try:
+                if e.is_dir(follow_symlinks=False):
+                    stack.append(e.path)
+                elif e.is_file(follow_symlinks=False):
+                    total += e.stat(follow_symlinks=False).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _stats_text(data_dir_bytes: int) -> str:
+    snap = metrics.snapshot()
+    counters = snap["counters"]
+    hits = counters.get("tts.cache_hit", 0)
+    lookups = hits + counters.get("tts.cache_miss", 0)
+    hit_rate = f"{100 * hits / lookups:.0f}% ({hits:.0f}/{lookups:.0f})" if lookups else "n/a"
+    lines = [
+        f"Uptime: {_fmt_sec(snap['uptime_sec'])}",
+        f"Queue: {len(metrics.queued_jobs())} waiting, {len(metrics.active_jobs())} running",
+        f"Jobs: {counters.get('jobs.completed', 0):.0f} done, {counters.get('jobs.failed', 0):.0f} failed, "
+        f"{counters.get('jobs.resumed', 0):.0f} resumed",
+        f"Throughput: {metrics.total_since('video_minutes_dubbed', 3600):.1f} video-min dubbed in the last hour",
+        f"Blocks rendered: {counters.get('tts.blocks', 0):.0f}",
+        f"TTS cache hit rate: {hit_rate}",
+        f"Disk ({os.environ.get('DATA_DIR', '/app/data')}): {_fmt_bytes(data_dir_bytes)}",
+        "",
+        "Avg stage latency:",
+    ]
+    for key, label in STAGES:
+        if key in snap["timers"]:
+            count, avg, mx = snap["timers"][key]
+            lines.append(f"  {label}: {_fmt_sec(avg)} (max {_fmt_sec(mx)}, n={count})")
+    return "\n".join(lines)
+
+
+def _queue_text() -> str:
+    active = {(j["chat_id"], j["url"]): j for j in metrics.active_jobs()}
+    queued = {(j["chat_id"], j["url"]): j for j in metrics.queued_jobs()}
+    jobs = processing_get_all()
+    if not jobs:
+        return "Queue is empty."
+    lines = [f"{len(jobs)} job(s):"]
+    now = time.time()
+    for k, job in enumerate(jobs, 1):
+        langs = ", ".join(t[0] for t in job.get("tracks") or []) or "en"
+        lines.append(f"\n{k}. {job['url']} [{langs}] (user {job['user_id']})")
+        live = active.get((job["chat_id"], job["url"]))
+        if live is None:
+            waiting = queued.get((job["chat_id"], job["url"]))
+            if waiting is not None:
+                lines.append(f"   Queued {_fmt_sec(now - waiting['queued'])} (waiting for a free slot)")
+            else:
+                lines.append("   Waiting (not started in this process)")
+            continue
+        lines.append(f"   Running {_fmt_sec(now - live['started'])}")
+        lines.extend("   " + line for line in _format_progress(live["state"]).splitlines())
+    return "\n".join(lines)
+
+
+async def stats_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if not update.message or not update.effective_user:
+        return
+    if not is_admin(update.effective_user.id):
+        await update.message.reply_text("Admins only.")
+        return
+    data_dir = os.environ.get("DATA_DIR", "/app/data")
+    size = await asyncio.to_thread(_dir_size, data_dir)
+    await update.message.reply_text(_stats_text(size))
+
+
+async def queue_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if not update.message or not update.effective_user:
+        return
+    if not is_admin(update.effective_user.id):
+        await update.message.reply_text("Admins only.")
+        return
+    await update.message.reply_text(_queue_text())
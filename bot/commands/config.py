@@ -4,6 +4,9 @@ CMD_AUTH = "/auth"
 CMD_LOGOUT = "/logout"
 CMD_START = "/start"
 CMD_YT = "/yt"
+# Admin only (ADMIN_USER_IDS)
+CMD_STATS = "/stats"
+CMD_QUEUE = "/queue"
 
 # Commands that don't require authentication
 ALLOWED_WITHOUT_AUTH = (CMD_AUTH, CMD_START, CMD_LOGOUT)
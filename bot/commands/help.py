@@ -10,7 +10,7 @@ HELP_MESSAGE = f"""Available commands:
 {CMD_START} — Show auth hint or usage
 {CMD_AUTH} <password> — Authenticate to use the bot
 {CMD_LOGOUT} — Remove your auth session
-{CMD_YT} <youtube_url> — Process a YouTube video
+{CMD_YT} <youtube_url> [lang[:voice] ...] — Dub a YouTube video (default: en)
 """
 
 
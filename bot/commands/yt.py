@@ -1,27 +1,63 @@
-"""Handle /yt <url>: reply processing, download, then done."""
+"""Handle /yt <url>: reply processing, download, then done.
+
+yt_dlp and the TTS pipeline are heavy to import, so they are loaded on first use (in worker
+threads) rather than at bot startup; warm_up_imports() can preload them in the background.
+"""
 
 import asyncio
 import glob
+import logging
 import os
 import re
 from pathlib import Path
 
-import yt_dlp
-from telegram import InputFile, Update
-from telegram.ext import ContextTypes
+from telegram import Bot, InputFile, Update
+from telegram.ext import Application, ContextTypes
 
+from bot import metrics
 from bot.stores.processing_store import (
     add as processing_add,
+    get_all as processing_get_all,
+    get_job as processing_get_job,
     remove as processing_remove,
     update_paths as processing_update_paths,
 )
-from bot.pipelines.tts_pipeline import run_tts_and_replace
+
+logger = logging.getLogger(__name__)
 
 # Match common YouTube URL forms
 YT_URL_PATTERN = re.compile(
     r"https?://(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/shorts/)[^\s]+",
     re.IGNORECASE,
 )
+# Video ID from any of those forms (youtu.be/X, watch?v=X&t=5, shorts/X)
+YT_ID_PATTERN = re.compile(r"(?:[?&]v=|youtu\.be/|/shorts/)([A-Za-z0-9_-]{11})")
+
+# Download tuning (see .env.example). Dubbing mode downloads video-only streams.
+YT_VIDEO_ONLY_ENV = "YT_VIDEO_ONLY"
+YT_MAX_HEIGHT_ENV = "YT_MAX_HEIGHT"
+YT_FRAGMENTS_ENV = "YT_CONCURRENT_FRAGMENTS"
+DEFAULT_MAX_HEIGHT = 720
+DEFAULT_FRAGMENTS = 4
+# Containers yt-dlp may write the video stream to; anything else next to it is not the video
+VIDEO_EXTENSIONS = (".mp4", ".webm", ".mkv", ".mov", ".flv", ".m4v")
+
+# Dub languages: /yt <url> [lang[:voice] ...], e.g. /yt <url> en es:es-MX-JorgeNeural
+LANG_PATTERN = re.compile(r"[a-z]{2,3}(?:-[A-Za-z0-9]{2,8})?")
+# Backend voice names: edge ('es-MX-JorgeNeural') or espeak ('en-us', 'en+f3')
+VOICE_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9+_-]{0,63}")
+DEFAULT_LANG = "en"
+MAX_DUB_LANGS = 4
+USAGE = "Usage: /yt <youtube_url> [lang[:voice] ...]"
+
+# Jobs downloading and dubbing at the same time; others wait in line (1 = one after another)
+MAX_CONCURRENT_JOBS_ENV = "MAX_CONCURRENT_JOBS"
+DEFAULT_MAX_CONCURRENT_JOBS = 1
+
+_job_slots: asyncio.Semaphore | None = None
+# Video IDs with a queued or running job: a video's download, track files and output are
+# shared by every job for it, so only one job per video may exist at a time
+_videos_in_flight: set[str] = set()
 
 
 def _extract_yt_url(text: str) -> str | None:
@@ -29,6 +65,11 @@ def _extract_yt_url(text: str) -> str | None:
     return m.group(0) if m else None
 
 
+def _video_id(url: str) -> str:
+    m = YT_ID_PATTERN.search(url)
+    return m.group(1) if m else url
+
+
 def _progress_hook(progress_state: dict, key: str):
     def hook(d):
         if d.get("status") == "downloading":
@@ -40,19 +81,63 @@ def _progress_hook(progress_state: dict, key: str):
     return hook
 
 
+def _env_flag(name: str, default: bool) -> bool:
+    raw = os.environ.get(name, "").strip().lower()
+    if not raw:
+        return default
+    return raw in ("1", "true", "yes")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+def _max_concurrent_jobs() -> int:
+    return max(1, _env_int(MAX_CONCURRENT_JOBS_ENV, DEFAULT_MAX_CONCURRENT_JOBS))
+
+
+def _video_format() -> str:
+    """yt-dlp format selector. In dubbing mode (default) fetch video-only streams, since the
+    original audio is replaced anyway; prefer codecs that stream-copy into mp4 (h264, then
+    av1/vp9 which ffmpeg also muxes into mp4), capped at YT_MAX_HEIGHT."""
+    height = _env_int(YT_MAX_HEIGHT_ENV, DEFAULT_MAX_HEIGHT)
+    h = f"[height<={height}]" if height > 0 else ""
+    if not _env_flag(YT_VIDEO_ONLY_ENV, True):
+        return f"bestvideo{h}+bestaudio/best{h}/best"
+    return "/".join([
+        f"bestvideo{h}[vcodec^=avc1]",
+        f"bestvideo{h}[ext=mp4]",
+        f"bestvideo{h}",
+        # Some videos only have muxed formats; the audio is dropped at mux time
+        f"best{h}",
+        "best",
+    ])
+
+
+def _video_candidates(out_dir: str, video_id: str) -> list[str]:
+    """Finished video files for video_id (subtitles, partial downloads and dub artifacts excluded)."""
+    return [
+        p for p in glob.glob(os.path.join(glob.escape(out_dir), f"{glob.escape(video_id)}.*"))
+        if p.endswith(VIDEO_EXTENSIONS)
+    ]
+
+
 def _download_video(
     url: str, out_dir: str, progress_state: dict | None = None, progress_key: str = "video_percent"
 ) -> tuple[str, str]:
-    """Download video only; return (video_path, video_id). Skip if already present."""
+    """Download video only; return (video_path, video_id). Skip if already present.
+    Partial downloads (.part) are kept and resumed on the next attempt."""
+    import yt_dlp
+
     Path(out_dir).mkdir(parents=True, exist_ok=True)
     opts_no_dl = {"quiet": True}
     with yt_dlp.YoutubeDL(opts_no_dl) as ydl:
         info = ydl.extract_info(url, download=False)
     video_id = info["id"]
-    video_candidates = [
-        p for p in glob.glob(os.path.join(out_dir, f"{video_id}.*"))
-        if not p.endswith(".srt") and not p.endswith(".vtt")
-    ]
+    video_candidates = _video_candidates(out_dir, video_id)
     if video_candidates:
         if progress_state is not None:
             progress_state[progress_key] = 100
@@ -60,62 +145,119 @@ def _download_video(
     opts = {
         "outtmpl": os.path.join(out_dir, "%(id)s.%(ext)s"),
         "quiet": True,
+        "format": _video_format(),
+        "concurrent_fragment_downloads": _env_int(YT_FRAGMENTS_ENV, DEFAULT_FRAGMENTS),
+        "continuedl": True,
+        "nopart": False,
+        "keep_fragments": False,
+        "retries": 10,
+        "fragment_retries": 10,
     }
     if progress_state is not None:
         opts["progress_hooks"] = [_progress_hook(progress_state, progress_key)]
     with yt_dlp.YoutubeDL(opts) as ydl:
-        ydl.extract_info(url, download=True)
-    video_candidates = [
-        p for p in glob.glob(os.path.join(out_dir, f"{video_id}.*"))
-        if not p.endswith(".srt") and not p.endswith(".vtt")
-    ]
+        # Reuse the metadata already fetched instead of extracting it a second time
+        ydl.process_ie_result(info, download=True)
+    video_candidates = _video_candidates(out_dir, video_id)
     video_path = video_candidates[0] if video_candidates else ""
     return (video_path, video_id)
 
 
-def _download_srt(
-    url: str, out_dir: str, progress_state: dict | None = None, progress_key: str = "srt_percent"
-) -> str | None:
-    """Download SRT only; return srt_path or None. Skip if already present."""
+def _find_srt(out_dir: str, video_id: str, lang: str) -> str | None:
+    """Existing subtitle file for lang ({id}.{lang}.srt/vtt, or a regional/-orig variant)."""
+    for ext in ("srt", "vtt"):
+        p = os.path.join(out_dir, f"{video_id}.{lang}.{ext}")
+        if os.path.isfile(p):
+            return p
+    for f in sorted(os.listdir(out_dir)):
+        if f.startswith(f"{video_id}.{lang}-") and (f.endswith(".srt") or f.endswith(".vtt")):
+            return os.path.join(out_dir, f)
+    return None
+
+
+def _download_srts(
+    url: str,
+    out_dir: str,
+    langs: list[str],
+    progress_state: dict | None = None,
+    progress_key: str = "srt_percent",
+) -> dict[str, str]:
+    """Download SRT for each of langs in one request; return {lang: srt_path} for the
+    languages found. Skip if already present."""
     out_dir = os.path.abspath(out_dir)
+    import yt_dlp
+
     Path(out_dir).mkdir(parents=True, exist_ok=True)
     opts_no_dl = {"quiet": True}
     with yt_dlp.YoutubeDL(opts_no_dl) as ydl:
         info = ydl.extract_info(url, download=False)
     video_id = info["id"]
-    for ext in ("srt", "vtt"):
-        p = os.path.join(out_dir, f"{video_id}.en.{ext}")
-        if os.path.isfile(p):
-            if progress_state is not None:
-                progress_state[progress_key] = 100
-            return p
-    for f in os.listdir(out_dir):
-        if f.startswith(video_id) and (f.endswith(".srt") or f.endswith(".vtt")):
-            if progress_state is not None:
-                progress_state[progress_key] = 100
-            return os.path.join(out_dir, f)
-    opts = {
-        "outtmpl": os.path.join(out_dir, "%(id)s.%(ext)s"),
-        "paths": {"home": out_dir, "temp": out_dir},
-        "quiet": True,
-        "skip_download": True,
-        "writesubtitles": True,
-        "writeautomaticsub": True,
-        "subtitlesformat": "srt",
-        "subtitleslangs": ["en"],
-    }
+    found = {lang: p for lang in langs if (p := _find_srt(out_dir, video_id, lang))}
+    missing = [lang for lang in langs if lang not in found]
+    written = []
+    if missing:
+        existing = set(os.listdir(out_dir))
+        opts = {
+            "outtmpl": os.path.join(out_dir, "%(id)s.%(ext)s"),
+            "paths": {"home": out_dir, "temp": out_dir},
+            "quiet": True,
+            "skip_download": True,
+            "writesubtitles": True,
+            "writeautomaticsub": True,
+            "subtitlesformat": "srt",
+            "subtitleslangs": missing,
+        }
+        if progress_state is not None:
+            opts["progress_hooks"] = [_progress_hook(progress_state, progress_key)]
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            ydl.process_ie_result(info, download=True)
+        written = sorted(set(os.listdir(out_dir)) - existing)
+        for lang in missing:
+            p = _find_srt(out_dir, video_id, lang)
+            if p:
+                found[lang] = p
+    if not found and len(langs) == 1:
+        # Single language: fall back to a subtitle yt-dlp wrote for this request (never a
+        # leftover file for another language)
+        for f in written:
+            if f.startswith(video_id) and (f.endswith(".srt") or f.endswith(".vtt")):
+                found[langs[0]] = os.path.join(out_dir, f)
+                break
     if progress_state is not None:
-        opts["progress_hooks"] = [_progress_hook(progress_state, progress_key)]
-    with yt_dlp.YoutubeDL(opts) as ydl:
-        ydl.extract_info(url, download=True)
-    for ext in ("srt", "vtt"):
-        p = os.path.join(out_dir, f"{video_id}.en.{ext}")
-        if os.path.isfile(p):
-            return p
-    for f in os.listdir(out_dir):
-        if f.startswith(video_id) and (f.endswith(".srt") or f.endswith(".vtt")):
-            return os.path.join(out_dir, f)
-    return None
+        progress_state[progress_key] = 100
+    return found
+
+
+def _run_pipeline(*args) -> str:
+    """Import and run the dub pipeline (call from a worker thread)."""
+    from bot.pipelines.tts_pipeline import run_multi_tts_and_replace
+
+    return run_multi_tts_and_replace(*args)
+
+
+def warm_up_imports() -> None:
+    """Preload yt_dlp, the TTS pipeline and the TTS backend so the first /yt doesn't pay for it."""
+    import yt_dlp  # noqa: F401
+    from bot.pipelines.tts_backends import get_backend
+    from bot.pipelines import tts_pipeline  # noqa: F401
+
+    get_backend().warm_up()
+
+
+def _parse_tracks(args: list[str]) -> list[tuple[str, str | None]]:
+    """Parse '/yt <url> [lang[:voice] ...]' args after the URL into [(lang, voice), ...]."""
+    tracks = []
+    for arg in args:
+        lang, _, voice = arg.partition(":")
+        if not LANG_PATTERN.fullmatch(lang):
+            raise ValueError(f"Invalid language '{lang}'")
+        if voice and not VOICE_PATTERN.fullmatch(voice):
+            raise ValueError(f"Invalid voice '{voice}'")
+        if lang not in (t[0] for t in tracks):
+            tracks.append((lang, voice or None))
+    if len(tracks) > MAX_DUB_LANGS:
+        raise ValueError(f"At most {MAX_DUB_LANGS} languages per job")
+    return tracks or [(DEFAULT_LANG, None)]
 
 
 def _format_progress(state: dict) -> str:
@@ -150,20 +292,18 @@ async def _progress_updater(progress_msg, progress_state: dict, interval: float
         pass
 
 
-async def handle_yt_url(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    if not update.message or not update.effective_user:
-        return
-    if not context.args:
-        await update.message.reply_text("Usage: /yt <youtube_url>")
-        return
-    url = _extract_yt_url(context.args[0])
-    if not url:
-        await update.message.reply_text("Invalid YouTube URL.")
-        return
-    chat_id = update.message.chat_id
-    user_id = update.effective_user.id
-
-    processing_add(chat_id, user_id, url)
+async def _run_job(
+    bot: Bot,
+    chat_id: int,
+    user_id: int,
+    url: str,
+    tracks: list[tuple[str, str | None]],
+    reply_to: int | None = None,
+) -> None:
+    """Download, dub and report one job to chat_id. The job must already be in
+    processing_store; it is removed when the job finishes or fails. Rendering resumes from
+    the pipeline's block checkpoints when the job was interrupted earlier."""
+    langs = [lang for lang, _ in tracks]
     progress_state = {
         "stage": "download",
         "video_percent": None,
@@ -173,53 +313,172 @@ async def handle_yt_url(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         "done": False,
         "error": None,
     }
+    metrics.job_started(chat_id, user_id, url, progress_state)
     try:
-        progress_msg = await update.message.reply_text("Processing...")
+        progress_msg = await bot.send_message(chat_id, "Processing...", reply_to_message_id=reply_to)
         updater_task = asyncio.create_task(
             _progress_updater(progress_msg, progress_state)
         )
         data_dir = os.environ.get("DATA_DIR", "/app/data")
         out_dir = os.path.join(data_dir, "downloads")
         try:
-            (video_path, _), srt_path = await asyncio.gather(
-                asyncio.to_thread(
-                    _download_video, url, out_dir, progress_state, "video_percent"
-                ),
-                asyncio.to_thread(
-                    _download_srt, url, out_dir, progress_state, "srt_percent"
-                ),
-            )
-            processing_update_paths(chat_id, url, video_path, srt_path)
+            with metrics.timer("download"):
+                (video_path, _), srt_paths = await asyncio.gather(
+                    asyncio.to_thread(
+                        _download_video, url, out_dir, progress_state, "video_percent"
+                    ),
+                    asyncio.to_thread(
+                        _download_srts, url, out_dir, langs, progress_state, "srt_percent"
+                    ),
+                )
+            processing_update_paths(chat_id, url, video_path, srt_paths.get(langs[0]), srt_paths)
             progress_state["stage"] = "tts"
+            dub_tracks = [(lang, srt_paths[lang], voice) for lang, voice in tracks if lang in srt_paths]
+            skipped = [lang for lang in langs if lang not in srt_paths]
             dubbed_path = ""
-            if video_path and srt_path:
-                dubbed_path = await asyncio.to_thread(
-                    run_tts_and_replace,
-                    srt_path,
-                    video_path,
-                    out_dir,
-                    progress_state,
-                )
+            if video_path and dub_tracks:
+                with metrics.timer("dub"):
+                    dubbed_path = await asyncio.to_thread(
+                        _run_pipeline,
+                        dub_tracks,
+                        video_path,
+                        out_dir,
+                        progress_state,
+                    )
             progress_state["done"] = True
+            metrics.inc("jobs.completed")
             await updater_task
+            if dubbed_path and skipped:
+                await bot.send_message(chat_id, f"No subtitles for: {', '.join(skipped)} (skipped).")
+            done_text = "TTS done. Video dubbed."
+            tts_stats = progress_state.get("tts_stats", {}).values()
+            trimmed = sum(t["trimmed_sec"] for t in tts_stats)
+            baseline = sum(t["baseline_trimmed_sec"] for t in tts_stats)
+            if trimmed > 0 or baseline > 0:
+                done_text += f" (trimmed {trimmed:.1f}s of speech; atempo-only fitting: {baseline:.1f}s)"
             send_video = os.environ.get("SEND_VIDEO_AFTER_DONE", "").strip().lower() in ("1", "true", "yes")
             if dubbed_path and send_video:
                 with open(dubbed_path, "rb") as f:
                     video_file = InputFile(f, filename=os.path.basename(dubbed_path))
-                await update.message.reply_video(
+                await bot.send_video(
+                    chat_id,
                     video=video_file,
-                    caption="TTS done. Video dubbed.",
+                    caption=done_text,
+                    reply_to_message_id=reply_to,
                     read_timeout=90,
                     write_timeout=120,
                 )
             else:
-                await update.message.reply_text(
-                    "TTS done. Video dubbed." if dubbed_path else "TTS skipped (no video or SRT)."
+                await bot.send_message(
+                    chat_id,
+                    done_text if dubbed_path else "TTS skipped (no video or SRT).",
+                    reply_to_message_id=reply_to,
                 )
         except Exception as e:
             progress_state["error"] = str(e)[:400]
             progress_state["done"] = True
+            metrics.inc("jobs.failed")
             await updater_task
-            await update.message.reply_text(f"Failed: {progress_state['error']}")
+            await bot.send_message(chat_id, f"Failed: {progress_state['error']}", reply_to_message_id=reply_to)
     finally:
+        metrics.job_finished(chat_id, url)
         processing_remove(chat_id, url)
+
+
+async def _queued_job(
+    video_id: str,
+    bot: Bot,
+    chat_id: int,
+    user_id: int,
+    url: str,
+    tracks: list[tuple[str, str | None]],
+    reply_to: int | None = None,
+) -> None:
+    global _job_slots
+    if _job_slots is None:
+        _job_slots = asyncio.Semaphore(_max_concurrent_jobs())
+    try:
+        async with _job_slots:
+            await _run_job(bot, chat_id, user_id, url, tracks, reply_to)
+    finally:
+        metrics.job_finished(chat_id, url)
+        _videos_in_flight.discard(video_id)
+
+
+def _start_job(
+    app: Application,
+    chat_id: int,
+    user_id: int,
+    url: str,
+    tracks: list[tuple[str, str | None]],
+    reply_to: int | None = None,
+    update: Update | None = None,
+) -> bool:
+    """Queue a job that is already in processing_store. Returns False (nothing started) if
+    a job for the same video is already queued or running."""
+    video_id = _video_id(url)
+    if video_id in _videos_in_flight:
+        return False
+    _videos_in_flight.add(video_id)
+    metrics.job_queued(chat_id, user_id, url)
+    app.create_task(
+        _queued_job(video_id, app.bot, chat_id, user_id, url, tracks, reply_to),
+        update=update,
+    )
+    return True
+
+
+async def handle_yt_url(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if not update.message or not update.effective_user:
+        return
+    if not context.args:
+        await update.message.reply_text(USAGE)
+        return
+    url = _extract_yt_url(context.args[0])
+    if not url:
+        await update.message.reply_text("Invalid YouTube URL.")
+        return
+    try:
+        tracks = _parse_tracks(context.args[1:])
+    except ValueError as e:
+        await update.message.reply_text(f"{e}.\n{USAGE}")
+        return
+    chat_id = update.message.chat_id
+    user_id = update.effective_user.id
+
+    if processing_get_job(chat_id, url) or _video_id(url) in _videos_in_flight:
+        await update.message.reply_text("This video is already being processed. Try again when it finishes.")
+        return
+    processing_add(chat_id, user_id, url, tracks)
+    # Run in the background so other updates (/stats, /queue, more /yt) are handled meanwhile
+    _start_job(context.application, chat_id, user_id, url, tracks, update.message.message_id, update)
+    if len(_videos_in_flight) > _max_concurrent_jobs():
+        await update.message.reply_text("Queued; it starts when a running job finishes.")
+
+
+async def resume_jobs(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Job queue callback, run once the application is running: requeue jobs left in
+    processing_store by a previous run (e.g. container restart) and tell each chat.
+    Rendering continues from the last completed block checkpoint."""
+    app = context.application
+    resumed = set()
+    for job in processing_get_all():
+        key = (job["chat_id"], job["url"])
+        if key in resumed:
+            # Same request stored twice; the running job's removal clears both
+            continue
+        tracks = [tuple(t) for t in job.get("tracks") or [(DEFAULT_LANG, None)]]
+        if not _start_job(app, job["chat_id"], job["user_id"], job["url"], tracks):
+            # Another stored job for the same video was resumed first
+            logger.info("Dropping duplicate job %s for chat %s", job["url"], job["chat_id"])
+            processing_remove(job["chat_id"], job["url"])
+            text = f"Bot restarted. This video is already being processed; send it again later:\n{job['url']}"
+        else:
+            logger.info("Resuming job %s for chat %s", job["url"], job["chat_id"])
+            resumed.add(key)
+            metrics.inc("jobs.resumed")
+            text = f"Bot restarted. Resuming your job:\n{job['url']}"
+        try:
+            await app.bot.send_message(job["chat_id"], text)
+        except Exception:
+            logger.exception("Could not notify chat %s", job["chat_id"])
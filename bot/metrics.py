@@ -0,0 +1,101 @@
+"""In-process metrics for /stats and /queue: counters, stage timers, rolling-window events
+and the progress of active jobs. Updates are a dict write under one uncontended lock, cheap
+enough to call on every block. Nothing is persisted; numbers reset when the bot restarts."""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Rolling events kept for throughput (e.g. video minutes dubbed in the last hour)
+_EVENT_WINDOW_SEC = 24 * 3600
+_MAX_EVENTS = 10000
+
+_lock = threading.Lock()
+_counters: dict[str, float] = {}
+_timers: dict[str, list] = {}  # name -> [count, total_sec, max_sec]
+_events: dict[str, deque] = {}  # name -> deque[(timestamp, value)]
+_jobs: dict[tuple, dict] = {}  # (chat_id, url) -> {"user_id", "started", "state"}
+_queued: dict[tuple, dict] = {}  # (chat_id, url) -> {"user_id", "url", "queued"}
+_started = time.time()
+
+
+def inc(name: str, value: float = 1.0) -> None:
+    with _lock:
+        _counters[name] = _counters.get(name, 0.0) + value
+
+
+def observe(name: str, seconds: float) -> None:
+    """Record one duration for stage name."""
+    with _lock:
+        t = _timers.get(name)
+        if t is None:
+            _timers[name] = [1, seconds, seconds]
+        else:
+            t[0] += 1
+            t[1] += seconds
+            if seconds > t[2]:
+                t[2] = seconds
+
+
+@contextmanager
+def timer(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started)
+
+
+def event(name: str, value: float) -> None:
+    """Record a timestamped value, summed over a window by total_since()."""
+    with _lock:
+        q = _events.get(name)
+        if q is None:
+            q = _events[name] = deque(maxlen=_MAX_EVENTS)
+        q.append((time.time(), value))
+
+
+def total_since(name: str, window_sec: float) -> float:
+    cutoff = time.time() - min(window_sec, _EVENT_WINDOW_SEC)
+    with _lock:
+        return sum(v for ts, v in _events.get(name, ()) if ts >= cutoff)
+
+
+def job_queued(chat_id: int, user_id: int, url: str) -> None:
+    """Track a job waiting for a free slot; job_started() moves it to active."""
+    with _lock:
+        _queued[(chat_id, url)] = {"user_id": user_id, "url": url, "queued": time.time()}
+
+
+def job_started(chat_id: int, user_id: int, url: str, state: dict) -> None:
+    """Track an active job; state is its live progress_state dict."""
+    with _lock:
+        _queued.pop((chat_id, url), None)
+        _jobs[(chat_id, url)] = {"user_id": user_id, "url": url, "started": time.time(), "state": state}
+
+
+def job_finished(chat_id: int, url: str) -> None:
+    with _lock:
+        _queued.pop((chat_id, url), None)
+        _jobs.pop((chat_id, url), None)
+
+
+def queued_jobs() -> list[dict]:
+    with _lock:
+        return [dict(j, chat_id=key[0]) for key, j in _queued.items()]
+
+
+def active_jobs() -> list[dict]:
+    with _lock:
+        return [dict(j, chat_id=key[0]) for key, j in _jobs.items()]
+
+
+def snapshot() -> dict:
+    """Copy of counters and timers ({name: (count, avg_sec, max_sec)})."""
+    with _lock:
+        return {
+            "uptime_sec": time.time() - _started,
+            "counters": dict(_counters),
+            "timers": {k: (c, total / c, mx) for k, (c, total, mx) in _timers.items()},
+        }
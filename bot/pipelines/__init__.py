@@ -1,5 +1,21 @@
-"""Pipelines: TTS from SRT, replace video audio."""
+"""Pipelines: TTS from SRT, replace video audio.
 
-from bot.pipelines.tts_pipeline import run_tts_and_replace
+Submodules are imported lazily on attribute access so importing bot.pipelines stays cheap.
+"""
 
-__all__ = ["run_tts_and_replace"]
+import importlib
+
+_EXPORTS = {
+    "TTSBackend": "bot.pipelines.tts_backends",
+    "get_backend": "bot.pipelines.tts_backends",
+    "run_multi_tts_and_replace": "bot.pipelines.tts_pipeline",
+    "run_tts_and_replace": "bot.pipelines.tts_pipeline",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_EXPORTS[name]), name)
@@ -0,0 +1,124 @@
+"""A/V sync verification: detect speech onsets in a rendered track and compare them with
+where each block was meant to start (sample positions from the pipeline's blocks file)."""
+
+import array
+import json
+import wave
+from collections import deque
+from typing import Iterable, Iterator
+
+# Analysis window for onset detection (samples at the track's rate; 10 ms at 24 kHz)
+ONSET_WINDOW = 240
+# Peak amplitude (16-bit) treated as sound
+ONSET_THRESHOLD = 500
+# Blocks averaged at each end of the track for the drift trend
+TREND_BLOCKS = 50
+
+
+def iter_onsets(
+    wav_path: str,
+    threshold: int = ONSET_THRESHOLD,
+    min_silence_sec: float = 0.03,
+) -> Iterator[int]:
+    """Yield sample positions where sound starts after at least min_silence_sec of silence.
+    Windows are scanned by peak amplitude; the onset is refined to the first loud sample."""
+    with wave.open(wav_path, "rb") as w:
+        if w.getnchannels() != 1 or w.getsampwidth() != 2:
+            raise ValueError(f"{wav_path}: expected mono 16-bit WAV")
+        rate = w.getframerate()
+        min_silent_windows = max(1, round(min_silence_sec * rate / ONSET_WINDOW))
+        silent_windows = min_silent_windows  # track start counts as silence
+        pos = 0
+        chunk_frames = ONSET_WINDOW * 100
+        while True:
+            frames = w.readframes(chunk_frames)
+            if not frames:
+                break
+            samples = array.array("h", frames)
+            for k in range(0, len(samples), ONSET_WINDOW):
+                window = samples[k:k + ONSET_WINDOW]
+                if max(window) > threshold or -min(window) > threshold:
+                    if silent_windows >= min_silent_windows:
+                        first = next(j for j, x in enumerate(window) if abs(x) > threshold)
+                        yield pos + k + first
+                    silent_windows = 0
+                else:
+                    silent_windows += 1
+            pos += len(samples)
+
+
+def iter_block_starts(blocks_path: str) -> Iterator[int]:
+    """Intended start sample of each block from a pipeline blocks file (JSON lines)."""
+    with open(blocks_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)["start_sample"]
+
+
+def drift_report(
+    wav_path: str,
+    intended: Iterable[int],
+    search_sec: float = 0.5,
+    threshold: int = ONSET_THRESHOLD,
+) -> dict:
+    """Match each intended block start to the nearest detected onset within search_sec and
+    summarize drift (actual - intended). Blocks whose onset can't be found (e.g. speech runs
+    straight into the next block) are counted as missed. trend_ms is the mean drift of the
+    last TREND_BLOCKS matched blocks minus the first TREND_BLOCKS: accumulated drift shows up
+    there even when a constant lead-in (TTS leading silence) offsets every block. Memory use
+    is constant in the number of blocks."""
+    with wave.open(wav_path, "rb") as w:
+        rate = w.getframerate()
+    search = round(search_sec * rate)
+    onsets = iter_onsets(wav_path, threshold)
+    # Detected onsets not yet matched, up to the first one past the current search window
+    window = deque()
+    exhausted = False
+    matched = 0
+    drift_sum = 0
+    max_abs = 0
+    first = []
+    last = deque(maxlen=TREND_BLOCKS)
+    worst = []
+    total = 0
+    for index, start in enumerate(intended):
+        total += 1
+        while window and window[0] < start - search:
+            window.popleft()
+        while not exhausted and (not window or window[-1] <= start + search):
+            onset = next(onsets, None)
+            if onset is None:
+                exhausted = True
+            else:
+                window.append(onset)
+        candidates = [o for o in window if abs(o - start) <= search]
+        if not candidates:
+            continue
+        # Nearest onset, not the first in the window: an earlier one is usually a pause
+        # inside the previous block's speech
+        onset = min(candidates, key=lambda o: abs(o - start))
+        while window and window[0] <= onset:
+            window.popleft()
+        drift = onset - start
+        matched += 1
+        drift_sum += drift
+        max_abs = max(max_abs, abs(drift))
+        if len(first) < TREND_BLOCKS:
+            first.append(drift)
+        last.append(drift)
+        if drift:
+            worst = sorted(worst + [(abs(drift), index, drift)], reverse=True)[:10]
+
+    def _ms(samples: float) -> float:
+        return round(1000 * samples / rate, 3)
+
+    return {
+        "sample_rate": rate,
+        "blocks": total,
+        "matched": matched,
+        "missed": total - matched,
+        "mean_drift_ms": _ms(drift_sum / matched) if matched else None,
+        "max_abs_drift_ms": _ms(max_abs) if matched else None,
+        "trend_ms": _ms(sum(last) / len(last) - sum(first) / len(first)) if matched else None,
+        "worst": [{"block": i, "drift_ms": _ms(d)} for _, i, d in worst],
+    }
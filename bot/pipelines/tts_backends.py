@@ -0,0 +1,162 @@
+"""TTS backends: edge-tts (online), espeak-ng (offline), fake (tests). Each writes an mp3."""
+
+import asyncio
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+# Select backend with TTS_BACKEND=edge|espeak|fake (default edge).
+TTS_BACKEND_ENV = "TTS_BACKEND"
+DEFAULT_BACKEND = "edge"
+
+# Output format shared by all backends so blocks can be concatenated with -c copy
+SAMPLE_RATE = 24000
+
+# Default edge-tts voice per subtitle language; override per job with /yt <url> lang:voice
+EDGE_VOICES = {
+    "en": "en-US-GuyNeural",
+    "es": "es-ES-AlvaroNeural",
+    "fr": "fr-FR-HenriNeural",
+    "de": "de-DE-ConradNeural",
+    "it": "it-IT-DiegoNeural",
+    "pt": "pt-BR-AntonioNeural",
+    "ru": "ru-RU-DmitryNeural",
+    "ja": "ja-JP-KeitaNeural",
+    "ko": "ko-KR-InJoonNeural",
+    "zh": "zh-CN-YunxiNeural",
+    "hi": "hi-IN-MadhurNeural",
+    "km": "km-KH-PisethNeural",
+}
+
+
+def _lang_root(lang: str) -> str:
+    """'en-US' / 'en-orig' -> 'en'."""
+    return lang.split("-")[0].lower()
+
+
+class TTSBackend:
+    """Base class. Subclasses implement synthesize() and default_voice()."""
+
+    name = ""
+
+    def default_voice(self, lang: str) -> str:
+        raise NotImplementedError
+
+    def warm_up(self) -> None:
+        """Load heavy dependencies ahead of the first synthesis (optional)."""
+
+    def synthesize(self, text: str, out_path: str, voice: str, rate: float = 1.0) -> None:
+        """Write speech for text to out_path (mp3, mono, SAMPLE_RATE). rate is the speaking
+        rate relative to the voice's normal speed (1.25 = 25% faster)."""
+        raise NotImplementedError
+
+
+class EdgeTTSBackend(TTSBackend):
+    name = "edge"
+
+    def default_voice(self, lang: str) -> str:
+        voice = EDGE_VOICES.get(_lang_root(lang))
+        if not voice:
+            raise ValueError(f"No default voice for '{lang}'. Use lang:voice, e.g. {lang}:<edge voice name>")
+        return voice
+
+    def warm_up(self) -> None:
+        from bot.pipelines.tts_client import get_pool, pool_size
+
+        if pool_size():
+            get_pool().warm(1)
+        else:
+            import edge_tts  # noqa: F401
+
+    def synthesize(self, text: str, out_path: str, voice: str, rate: float = 1.0) -> None:
+        from bot.pipelines.tts_client import get_pool, pool_size
+
+        if pool_size():
+            # Reuse a warm websocket from the shared pool
+            Path(out_path).write_bytes(get_pool().synthesize(text, voice, rate))
+            return
+        import edge_tts
+
+        async def _do():
+            communicate = edge_tts.Communicate(text, voice, rate=f"{round((rate - 1) * 100):+d}%")
+            await communicate.save(out_path)
+        asyncio.run(_do())
+
+
+# espeak's default speed (words per minute); scaled by rate
+ESPEAK_WPM = 175
+
+
+class EspeakBackend(TTSBackend):
+    """Offline backend using espeak-ng (or espeak). Voice is an espeak voice name, e.g. 'en-us'."""
+
+    name = "espeak"
+
+    def __init__(self) -> None:
+        self.binary = shutil.which("espeak-ng") or shutil.which("espeak")
+
+    def default_voice(self, lang: str) -> str:
+        return lang.lower()
+
+    def synthesize(self, text: str, out_path: str, voice: str, rate: float = 1.0) -> None:
+        if not self.binary:
+            raise RuntimeError("espeak-ng not installed")
+        with tempfile.TemporaryDirectory() as tmp:
+            wav = Path(tmp) / "speech.wav"
+            subprocess.run(
+                # Text on stdin: cue lines like "- Hello" would otherwise parse as options
+                [self.binary, "-v", voice, "-s", str(round(ESPEAK_WPM * rate)), "-w", str(wav), "--stdin"],
+                input=text.encode("utf-8"),
+                capture_output=True,
+                check=True,
+            )
+            _encode_mp3(str(wav), out_path)
+
+
+class FakeBackend(TTSBackend):
+    """Deterministic tone, ~seconds_per_word long. No network; for tests and local runs."""
+
+    name = "fake"
+
+    def __init__(self, seconds_per_word: float = 0.35) -> None:
+        self.seconds_per_word = seconds_per_word
+
+    def default_voice(self, lang: str) -> str:
+        return f"fake-{lang}"
+
+    def synthesize(self, text: str, out_path: str, voice: str, rate: float = 1.0) -> None:
+        duration = max(0.1, len(text.split()) * self.seconds_per_word / rate)
+        subprocess.run(
+            [
+                "ffmpeg", "-y", "-f", "lavfi", "-i",
+                f"sine=frequency=440:sample_rate={SAMPLE_RATE}:duration={duration:.3f}",
+                "-ac", "1", "-q:a", "9", out_path,
+            ],
+            capture_output=True,
+            check=True,
+        )
+
+
+def _encode_mp3(in_path: str, out_path: str) -> None:
+    subprocess.run(
+        ["ffmpeg", "-y", "-i", in_path, "-ac", "1", "-ar", str(SAMPLE_RATE), "-q:a", "4", out_path],
+        capture_output=True,
+        check=True,
+    )
+
+
+_BACKENDS = {
+    EdgeTTSBackend.name: EdgeTTSBackend,
+    EspeakBackend.name: EspeakBackend,
+    FakeBackend.name: FakeBackend,
+}
+
+
+def get_backend(name: str | None = None) -> TTSBackend:
+    """Backend by name, or from TTS_BACKEND env."""
+    name = (name or os.environ.get(TTS_BACKEND_ENV, "") or DEFAULT_BACKEND).strip().lower()
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown TTS backend '{name}' (choose from {', '.join(_BACKENDS)})")
+    return _BACKENDS[name]()
@@ -0,0 +1,272 @@
+"""Pooled edge-tts client: keeps a few warm websocket connections to the Edge speech service
+and sends one synthesis request after another over each, instead of a new TLS websocket
+handshake per block and chunk (what edge_tts.Communicate does).
+
+The pool lives on its own event loop thread so it is shared by every pipeline worker thread
+and survives across jobs. Connections are health-checked by websocket heartbeat (a missed
+pong closes them), retired after max_requests or max_idle_sec, and reconnected on any error.
+
+Enabled with TTS_POOL_SIZE > 0. Unlike edge_tts.Communicate it does not split text by byte
+length or retry a 403 after correcting clock skew; blocks are already chunked by
+_chunk_text.
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape, quoteattr
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Warm connections kept per process. Off by default (edge_tts.Communicate per request): the
+# pool speaks the service protocol itself and relies on the pinned edge-tts version's internals
+TTS_POOL_SIZE_ENV = "TTS_POOL_SIZE"
+DEFAULT_POOL_SIZE = 0
+
+# Voice names edge_tts accepts: short ('en-US-GuyNeural') or the service's long form
+_SHORT_VOICE = re.compile(r"([a-z]{2,})-([A-Z]{2,})-(.+Neural)")
+_LONG_VOICE = re.compile(r"Microsoft Server Speech Text to Speech Voice \(.+,.+\)")
+
+OUTPUT_FORMAT = "audio-24khz-48kbitrate-mono-mp3"
+
+
+def pool_size() -> int:
+    try:
+        return max(0, int(os.environ.get(TTS_POOL_SIZE_ENV, "").strip() or DEFAULT_POOL_SIZE))
+    except ValueError:
+        return DEFAULT_POOL_SIZE
+
+
+def _timestamp() -> str:
+    return datetime.now(timezone.utc).strftime("%a %b %d %Y %H:%M:%S GMT+0000 (Coordinated Universal Time)")
+
+
+def _voice_name(voice: str) -> str:
+    """'en-US-GuyNeural' -> the service's long voice name (as edge_tts does).
+    Raises ValueError for anything edge_tts would reject."""
+    m = _SHORT_VOICE.fullmatch(voice)
+    if m:
+        lang, region, name = m.groups()
+        if "-" in name:
+            # 'zh-CN-liaoning-XiaobeiNeural' -> region 'CN-liaoning'
+            sub, name = name.split("-", 1)
+            region = f"{region}-{sub}"
+        voice = f"Microsoft Server Speech Text to Speech Voice ({lang}-{region}, {name})"
+    if not _LONG_VOICE.fullmatch(voice):
+        raise ValueError(f"Invalid voice '{voice}'")
+    return voice
+
+
+def _ssml(text: str, voice: str, rate: float) -> str:
+    return (
+        "<speak version='1.0' xmlns='http://www.w3.org/2001/10/synthesis' xml:lang='en-US'>"
+        f"<voice name={quoteattr(_voice_name(voice))}>"
+        f"<prosody pitch='+0Hz' rate='{round((rate - 1) * 100):+d}%' volume='+0%'>{escape(text)}</prosody>"
+        "</voice></speak>"
+    )
+
+
+def _edge_endpoint() -> tuple[str, dict]:
+    """Websocket URL (with a fresh Sec-MS-GEC token) and headers for the Edge service."""
+    from edge_tts.constants import SEC_MS_GEC_VERSION, WSS_HEADERS, WSS_URL
+    from edge_tts.drm import DRM
+
+    url = (
+        f"{WSS_URL}&ConnectionId={uuid.uuid4().hex}"
+        f"&Sec-MS-GEC={DRM.generate_sec_ms_gec()}&Sec-MS-GEC-Version={SEC_MS_GEC_VERSION}"
+    )
+    headers = DRM.headers_with_muid(WSS_HEADERS) if hasattr(DRM, "headers_with_muid") else dict(WSS_HEADERS)
+    return url, headers
+
+
+class _Connection:
+    """One websocket to the speech service, reused for sequential requests."""
+
+    def __init__(self, pool: "TTSPool") -> None:
+        self.pool = pool
+        self.ws = None
+        self.requests = 0
+        self.last_used = 0.0
+
+    async def _connect(self) -> None:
+        await self.close()
+        url, headers = self.pool.endpoint()
+        self.ws = await self.pool.session.ws_connect(
+            url,
+            headers=headers,
+            compress=15,
+            heartbeat=self.pool.heartbeat_sec,
+            receive_timeout=self.pool.receive_timeout,
+        )
+        self.pool.handshakes += 1
+        self.requests = 0
+        self.last_used = time.monotonic()
+        # Output format is per connection; sent once after connecting
+        await self.ws.send_str(
+            f"X-Timestamp:{_timestamp()}\r\n"
+            "Content-Type:application/json; charset=utf-8\r\n"
+            "Path:speech.config\r\n\r\n"
+            + json.dumps({"context": {"synthesis": {"audio": {
+                "metadataoptions": {"sentenceBoundaryEnabled": "false", "wordBoundaryEnabled": "false"},
+                "outputFormat": OUTPUT_FORMAT,
+            }}}})
+        )
+
+    async def _healthy(self) -> bool:
+        if self.ws is None or self.ws.closed:
+            return False
+        if self.requests >= self.pool.max_requests:
+            return False
+        # The service drops long-idle sockets; reconnect rather than fail the next request
+        return time.monotonic() - self.last_used <= self.pool.max_idle_sec
+
+    async def synthesize(self, ssml: str) -> bytes:
+        if not await self._healthy():
+            await self._connect()
+        request_id = uuid.uuid4().hex
+        await self.ws.send_str(
+            f"X-RequestId:{request_id}\r\n"
+            "Content-Type:application/ssml+xml\r\n"
+            f"X-Timestamp:{_timestamp()}Z\r\n"
+            "Path:ssml\r\n\r\n"
+            + ssml
+        )
+        audio = bytearray()
+        while True:
+            msg = await self.ws.receive()
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                header = msg.data.split("\r\n\r\n", 1)[0]
+                if "Path:turn.end" in header:
+                    break
+            elif msg.type == aiohttp.WSMsgType.BINARY:
+                # 2-byte big-endian header length, header, then audio payload
+                header_len = int.from_bytes(msg.data[:2], "big")
+                header = msg.data[2:2 + header_len]
+                if b"Path:audio" in header:
+                    audio += msg.data[2 + header_len:]
+            else:
+                raise ConnectionError(f"TTS websocket closed ({msg.type.name})")
+        self.requests += 1
+        self.last_used = time.monotonic()
+        if not audio:
+            raise RuntimeError("No audio received from TTS service")
+        return bytes(audio)
+
+    async def close(self) -> None:
+        if self.ws is not None and not self.ws.closed:
+            await self.ws.close()
+        self.ws = None
+
+
+class TTSPool:
+    """Fixed-size pool of reusable TTS websocket connections on a dedicated event loop.
+    endpoint() returns (url, headers) for a new connection; tests point it at a local server."""
+
+    def __init__(
+        self,
+        size: int = 4,
+        endpoint=_edge_endpoint,
+        max_requests: int = 200,
+        heartbeat_sec: float = 15.0,
+        max_idle_sec: float = 120.0,
+        receive_timeout: float = 60.0,
+        retries: int = 2,
+    ) -> None:
+        self.size = size
+        self.endpoint = endpoint
+        self.max_requests = max_requests
+        self.heartbeat_sec = heartbeat_sec
+        self.max_idle_sec = max_idle_sec
+        self.receive_timeout = receive_timeout
+        self.retries = retries
+        self.handshakes = 0
+        self.session = None
+        self._idle = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True, name="tts-pool")
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._setup(), self._loop).result()
+
+    async def _setup(self) -> None:
+        self.session = aiohttp.ClientSession()
+        # LIFO: reuse the most recently used (warm) connection; others open only under load
+        self._idle = asyncio.LifoQueue()
+        for _ in range(self.size):
+            self._idle.put_nowait(_Connection(self))
+
+    async def _synthesize(self, text: str, voice: str, rate: float) -> bytes:
+        # Built first: an invalid voice is the caller's error, not a connection failure
+        ssml = _ssml(text, voice, rate)
+        conn = await self._idle.get()
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    return await conn.synthesize(ssml)
+                except asyncio.CancelledError:
+                    # Abandoned mid-response; its remaining frames must not reach the next request
+                    await conn.close()
+                    raise
+                except Exception:
+                    # Drop the broken connection; the next attempt reconnects
+                    await conn.close()
+                    if attempt == self.retries:
+                        raise
+                    logger.warning("TTS connection failed, reconnecting (attempt %d)", attempt + 1)
+        finally:
+            self._idle.put_nowait(conn)
+
+    def synthesize(self, text: str, voice: str, rate: float = 1.0, timeout: float = 300) -> bytes:
+        """Synthesize text to mp3 bytes. Safe to call from any thread."""
+        future = asyncio.run_coroutine_threadsafe(self._synthesize(text, voice, rate), self._loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            # Stop the request on the pool loop so it releases its connection
+            future.cancel()
+            raise
+
+    async def _warm(self, n: int) -> None:
+        conns = [await self._idle.get() for _ in range(min(n, self.size))]
+        try:
+            for conn in conns:
+                if not await conn._healthy():
+                    await conn._connect()
+        finally:
+            for conn in conns:
+                self._idle.put_nowait(conn)
+
+    def warm(self, n: int = 1) -> None:
+        """Open up to n connections ahead of the first request."""
+        asyncio.run_coroutine_threadsafe(self._warm(n), self._loop).result(60)
+
+    async def _close(self) -> None:
+        while not self._idle.empty():
+            await self._idle.get_nowait().close()
+        await self.session.close()
+
+    def close(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._close(), self._loop).result(30)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> TTSPool:
+    """Process-wide Edge TTS pool (created on first use)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TTSPool(pool_size())
+        return _pool
@@ -2,18 +2,49 @@
 
 import os
 import re
-import shutil
 import subprocess
+import json
+import logging
+import struct
+import threading
+import time
+import wave
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterable, Iterator
 
-import edge_tts
+from bot import metrics
+from bot.pipelines.sync_check import drift_report, iter_block_starts
+from bot.pipelines.tts_backends import SAMPLE_RATE, TTSBackend, get_backend
+
+logger = logging.getLogger(__name__)
 
 # Optional cap (seconds) for testing: only process first N seconds of video. Set VIDEO_CAP_SEC in env.
 VIDEO_CAP_SEC_ENV = "VIDEO_CAP_SEC"
 
+# Timeline audio is mono 16-bit PCM at the backends' SAMPLE_RATE
+SAMPLE_WIDTH = 2
+
+_WAV_HEADER_SIZE = 44
+
+# Set TTS_RATE_CONTROL=0 to synthesize at normal rate and fit blocks with atempo/trim only
+TTS_RATE_CONTROL_ENV = "TTS_RATE_CONTROL"
+
+# LRU of synthesized audio for short repeated blocks ("[Music]", intros), shared across jobs
+_TTS_CACHE_MAX = 256
+_TTS_CACHE_MAX_CHARS = 200
+_tts_cache: OrderedDict[tuple, bytes] = OrderedDict()
+_tts_cache_lock = threading.Lock()
+
 # SRT timestamp line: 00:00:11,800 --> 00:00:13,199
 SRT_TIMING = re.compile(r"(\d{2}):(\d{2}):(\d{2})[,.](\d{3})\s*-->\s*(\d{2}):(\d{2}):(\d{2})[,.](\d{3})")
-DEFAULT_VOICE = "en-US-GuyNeural"
+
+# ISO 639-2 codes for mp4 audio stream language tags (mov muxer needs 3-letter codes)
+LANG_ISO639_2 = {
+    "en": "eng", "es": "spa", "fr": "fra", "de": "deu", "it": "ita", "pt": "por",
+    "ru": "rus", "ja": "jpn", "ko": "kor", "zh": "zho", "hi": "hin", "km": "khm",
+}
 
 
 def _srt_timestamp_to_sec(match, start: bool) -> float:
@@ -24,61 +55,82 @@ def _srt_timestamp_to_sec(match, start: bool) -> float:
     return h * 3600 + m * 60 + s + ms / 1000.0
 
 
-def _parse_srt_cues(path: str) -> list[tuple[float, float, str]]:
-    """Parse SRT into list of (start_sec, end_sec, text) per cue."""
-    text = Path(path).read_text(encoding="utf-8", errors="replace")
-    lines = text.strip().replace("\r", "").split("\n")
-    cues = []
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-        i += 1
-        if not line:
-            continue
-        if line.isdigit():
-            if i >= len(lines):
+def _iter_srt_cues(path: str) -> Iterator[tuple[float, float, str]]:
+    """Stream (start_sec, end_sec, text) per SRT cue, reading the file line by line."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        lines = (line.strip() for line in f)
+        for line in lines:
+            if not line.isdigit():
+                continue
+            timing_line = next(lines, None)
+            if timing_line is None:
                 break
-            timing_line = lines[i].strip()
-            i += 1
             m = SRT_TIMING.search(timing_line)
             if not m:
                 continue
             start_sec = _srt_timestamp_to_sec(m, True)
             end_sec = _srt_timestamp_to_sec(m, False)
             parts = []
-            while i < len(lines) and lines[i].strip():
-                parts.append(lines[i].strip())
-                i += 1
-            i += 1
+            for text_line in lines:
+                if not text_line:
+                    break
+                parts.append(text_line)
             cue_text = " ".join(parts)
             if cue_text:
-                cues.append((start_sec, end_sec, cue_text))
-    return cues
+                yield (start_sec, end_sec, cue_text)
 
 
-def _group_cues_into_blocks(
-    cues: list[tuple[float, float, str]],
+def _parse_srt_cues(path: str) -> list[tuple[float, float, str]]:
+    """Parse SRT into list of (start_sec, end_sec, text) per cue."""
+    return list(_iter_srt_cues(path))
+
+
+def _iter_blocks(
+    cues: Iterable[tuple[float, float, str]],
     max_gap_sec: float = 0.8,
     max_block_duration_sec: float = 30.0,
-) -> list[tuple[float, float, str]]:
-    """Group consecutive cues into speech blocks. A new block starts when gap > max_gap_sec
-    or block would exceed max_block_duration_sec. Returns list of (start_sec, end_sec, text)."""
-    if not cues:
-        return []
-    blocks = []
-    block_start, block_end, parts = cues[0][0], cues[0][1], [cues[0][2]]
-    for i in range(1, len(cues)):
-        start_sec, end_sec, text = cues[i]
+) -> Iterator[tuple[float, float, str]]:
+    """Group consecutive cues into speech blocks as they stream in. A new block starts when
+    gap > max_gap_sec or block would exceed max_block_duration_sec. Yields (start_sec, end_sec, text)."""
+    cues = iter(cues)
+    first = next(cues, None)
+    if first is None:
+        return
+    block_start, block_end, parts = first[0], first[1], [first[2]]
+    for start_sec, end_sec, text in cues:
         gap = start_sec - block_end
         # New block if gap is large or adding this cue would exceed max block duration
         if gap > max_gap_sec or (end_sec - block_start > max_block_duration_sec):
-            blocks.append((block_start, block_end, " ".join(parts)))
+            yield (block_start, block_end, " ".join(parts))
             block_start, block_end, parts = start_sec, end_sec, [text]
         else:
             block_end = end_sec
             parts.append(text)
-    blocks.append((block_start, block_end, " ".join(parts)))
-    return blocks
+    yield (block_start, block_end, " ".join(parts))
+
+
+def _group_cues_into_blocks(
+    cues: list[tuple[float, float, str]],
+    max_gap_sec: float = 0.8,
+    max_block_duration_sec: float = 30.0,
+) -> list[tuple[float, float, str]]:
+    """Group consecutive cues into speech blocks. Returns list of (start_sec, end_sec, text)."""
+    return list(_iter_blocks(cues, max_gap_sec, max_block_duration_sec))
+
+
+def _iter_track_blocks(
+    srt_path: str, effective_duration: float
+) -> Iterator[tuple[float, float, str, float]]:
+    """Stream blocks for a track as (start_sec, end_sec, text, next_start_sec), where
+    next_start_sec is the following block's start (or effective_duration for the last)."""
+    cues = (c for c in _iter_srt_cues(srt_path) if c[0] < effective_duration)
+    prev = None
+    for block in _iter_blocks(cues):
+        if prev is not None:
+            yield (*prev, block[0])
+        prev = block
+    if prev is not None:
+        yield (*prev, effective_duration)
 
 
 def _parse_srt(path: str) -> str:
@@ -120,13 +172,81 @@ def _duration_seconds(media_path: str) -> float:
     return float(out.stdout.strip())
 
 
-def _generate_tts(text: str, out_path: str, voice: str = DEFAULT_VOICE) -> None:
-    """Generate TTS to file (run from sync context via asyncio.run or from async)."""
-    import asyncio
-    async def _do():
-        communicate = edge_tts.Communicate(text, voice)
-        await communicate.save(out_path)
-    asyncio.run(_do())
+def _generate_tts(text: str, out_path: str, backend: TTSBackend, voice: str, rate: float = 1.0) -> None:
+    """Generate TTS for text to out_path with the given backend, voice and speaking rate.
+    Short texts are served from an in-memory LRU when the same request was made before."""
+    key = (backend.name, voice, round(rate, 2), text) if len(text) <= _TTS_CACHE_MAX_CHARS else None
+    if key is not None:
+        with _tts_cache_lock:
+            data = _tts_cache.get(key)
+            if data is not None:
+                _tts_cache.move_to_end(key)
+        if data is not None:
+            metrics.inc("tts.cache_hit")
+            Path(out_path).write_bytes(data)
+            return
+        # Only cacheable requests count toward the hit rate
+        metrics.inc("tts.cache_miss")
+    with metrics.timer("tts.synthesize"):
+        backend.synthesize(text, out_path, voice, rate)
+    if key is not None:
+        data = Path(out_path).read_bytes()
+        with _tts_cache_lock:
+            _tts_cache[key] = data
+            while len(_tts_cache) > _TTS_CACHE_MAX:
+                _tts_cache.popitem(last=False)
+
+
+def _rate_control_enabled() -> bool:
+    return os.environ.get(TTS_RATE_CONTROL_ENV, "1").strip().lower() not in ("0", "false", "no")
+
+
+class _RateController:
+    """Picks a speaking rate per block so synthesized speech fits its slot at synthesis time.
+    Keeps a running estimate of the voice's characters/second at rate 1.0 (calibrated from
+    every synthesis in the job) to predict duration before synthesizing."""
+
+    def __init__(
+        self,
+        min_rate: float = 0.9,
+        max_rate: float = 1.6,
+        tolerance: float = 0.08,
+        max_passes: int = 3,
+        chars_per_sec: float = 15.0,
+    ) -> None:
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.tolerance = tolerance
+        self.max_passes = max_passes
+        self.chars_per_sec = chars_per_sec
+        self._samples = 0
+
+    def _clamp(self, rate: float) -> float:
+        return min(self.max_rate, max(self.min_rate, rate))
+
+    def initial_rate(self, text: str, slot_sec: float) -> float:
+        predicted = len(text) / self.chars_per_sec
+        return self._clamp(predicted / slot_sec)
+
+    def observe(self, text: str, rate: float, duration_sec: float) -> None:
+        """Update the chars/sec estimate from a synthesis result (running mean, recent-weighted)."""
+        if duration_sec <= 0:
+            return
+        cps = len(text) / (duration_sec * rate)
+        self._samples += 1
+        weight = max(0.2, 1 / self._samples)
+        self.chars_per_sec += weight * (cps - self.chars_per_sec)
+
+    def next_rate(self, rate: float, duration_sec: float, slot_sec: float) -> float | None:
+        """Rate for another pass, or None if the result is within tolerance or can't improve."""
+        error = (duration_sec - slot_sec) / slot_sec
+        if abs(error) <= self.tolerance:
+            return None
+        # Scale rate by the miss; stop once clamping leaves nothing to gain
+        new_rate = self._clamp(rate * duration_sec / slot_sec)
+        if abs(new_rate - rate) < 0.02:
+            return None
+        return new_rate
 
 
 def _chunk_text(text: str, max_chars: int = 1500) -> list[str]:
@@ -154,7 +274,8 @@ def _chunk_text(text: str, max_chars: int = 1500) -> list[str]:
 
 def _concat_audio(paths: list[str], out_path: str) -> None:
     """Concatenate audio files with ffmpeg concat demuxer."""
-    list_path = Path(out_path).parent / "_concat_list.txt"
+    # List file is named after out_path so parallel tracks don't share it
+    list_path = Path(out_path).with_suffix(".concat.txt")
     list_path.write_text(
         "\n".join(f"file '{Path(p).absolute()}'" for p in paths),
         encoding="utf-8",
@@ -171,31 +292,103 @@ def _concat_audio(paths: list[str], out_path: str) -> None:
     list_path.unlink(missing_ok=True)
 
 
-def _create_silence(duration_sec: float, out_path: str, sample_rate: int = 24000) -> None:
-    """Create a silent audio file of given duration (seconds)."""
-    if duration_sec <= 0:
-        return
-    subprocess.run(
-        [
-            "ffmpeg", "-y", "-f", "lavfi", "-i",
-            f"anullsrc=r={sample_rate}:cl=mono",
-            "-t", str(duration_sec),
-            "-q:a", "9", out_path,
-        ],
-        capture_output=True,
-        check=True,
-    )
+def _decode_pcm(audio_path: str, out_path: str) -> int:
+    """Decode audio to mono 16-bit WAV at SAMPLE_RATE; return its length in samples."""
+    with metrics.timer("tts.decode"):
+        subprocess.run(
+            [
+                "ffmpeg", "-y", "-i", audio_path,
+                "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-c:a", "pcm_s16le",
+                out_path,
+            ],
+            capture_output=True,
+            check=True,
+        )
+    with wave.open(out_path, "rb") as w:
+        return w.getnframes()
+
+
+class _WavTimeline:
+    """Mono 16-bit PCM WAV built in process. Silence is written as zero samples and blocks
+    are copied in, so every position and gap is an exact sample count."""
+
+    # Cached zero buffer (one second) reused for every gap
+    _ZEROS = bytes(SAMPLE_RATE * SAMPLE_WIDTH)
+
+    def __init__(self, path: Path, resume_samples: int | None = None) -> None:
+        """resume_samples: reopen an existing timeline and continue after that many samples
+        (anything written after the last checkpoint is dropped)."""
+        self.path = path
+        if resume_samples is not None:
+            self._f = open(path, "r+b")
+            self._f.truncate(_WAV_HEADER_SIZE + resume_samples * SAMPLE_WIDTH)
+            self._f.seek(0, os.SEEK_END)
+            self.position = resume_samples
+        else:
+            self._f = open(path, "wb")
+            self._f.write(self._header(0))
+            self.position = 0  # samples written so far
+
+    @staticmethod
+    def _header(n_samples: int) -> bytes:
+        data_size = n_samples * SAMPLE_WIDTH
+        return (
+            b"RIFF" + struct.pack("<I", 36 + data_size) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, SAMPLE_RATE, SAMPLE_RATE * SAMPLE_WIDTH, SAMPLE_WIDTH, 16)
+            + b"data" + struct.pack("<I", data_size)
+        )
+
+    def write_silence(self, n_samples: int) -> None:
+        remaining = n_samples * SAMPLE_WIDTH
+        while remaining > 0:
+            chunk = min(remaining, len(self._ZEROS))
+            self._f.write(self._ZEROS[:chunk])
+            remaining -= chunk
+        self.position += max(0, n_samples)
+
+    def write_pcm(self, frames: bytes) -> None:
+        self._f.write(frames)
+        self.position += len(frames) // SAMPLE_WIDTH
+
+    def append_wav(self, wav_path: str, max_samples: int | None = None) -> int:
+        """Copy samples from a mono WAV at SAMPLE_RATE (at most max_samples); return count."""
+        written = 0
+        with wave.open(wav_path, "rb") as w:
+            if w.getnchannels() != 1 or w.getsampwidth() != SAMPLE_WIDTH or w.getframerate() != SAMPLE_RATE:
+                raise ValueError(f"{wav_path}: expected mono 16-bit {SAMPLE_RATE} Hz")
+            limit = w.getnframes() if max_samples is None else min(w.getnframes(), max_samples)
+            while written < limit:
+                frames = w.readframes(min(SAMPLE_RATE, limit - written))
+                if not frames:
+                    break
+                self.write_pcm(frames)
+                written += len(frames) // SAMPLE_WIDTH
+        return written
+
+    def flush(self) -> None:
+        self._f.flush()
+
+    def close(self) -> None:
+        self._f.seek(0)
+        self._f.write(self._header(self.position))
+        self._f.close()
+
+
+# Largest atempo speed-up applied to fit a block before the rest is trimmed
+MAX_ATEMPO = 1.2
 
 
 def _stretch_audio(
     audio_path: str,
     out_path: str,
     target_duration_sec: float,
-    max_atempo: float = 1.2,
+    max_atempo: float = MAX_ATEMPO,
+    current_sec: float | None = None,
 ) -> None:
     """Stretch/speed audio toward target_duration_sec. Caps speed-up at max_atempo (e.g. 1.2x)
-    so voice doesn't sound too fast. Does not trim here; caller trims only if overlap."""
-    current = _duration_seconds(audio_path)
+    so voice doesn't sound too fast. Does not trim here; caller trims only if overlap.
+    current_sec skips probing the input when its duration is already known."""
+    current = current_sec if current_sec is not None else _duration_seconds(audio_path)
     if current <= 0:
         raise ValueError("TTS audio has zero duration")
     ratio = current / target_duration_sec
@@ -209,172 +402,376 @@ def _stretch_audio(
         filters.append("atempo=0.5")
         r /= 0.5
     filters.append(f"atempo={r}")
-    subprocess.run(
-        [
-            "ffmpeg", "-y", "-i", audio_path,
-            "-filter:a", ",".join(filters),
-            "-vn", out_path,
-        ],
-        capture_output=True,
-        check=True,
-    )
-
-
-def _trim_audio(audio_path: str, out_path: str, max_duration_sec: float) -> None:
-    """Trim audio to at most max_duration_sec (only if longer)."""
-    current = _duration_seconds(audio_path)
-    if current <= max_duration_sec:
-        if audio_path != out_path:
-            shutil.copy2(audio_path, out_path)
-        return
-    subprocess.run(
-        [
-            "ffmpeg", "-y", "-i", audio_path,
-            "-t", str(max_duration_sec),
-            "-c", "copy", out_path,
-        ],
-        capture_output=True,
-        check=True,
-    )
+    with metrics.timer("tts.stretch"):
+        subprocess.run(
+            [
+                "ffmpeg", "-y", "-i", audio_path,
+                "-filter:a", ",".join(filters),
+                "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), out_path,
+            ],
+            capture_output=True,
+            check=True,
+        )
 
 
 def _replace_video_audio(
     video_path: str,
-    audio_path: str,
+    audio_tracks: list[tuple[str, str]],
     out_path: str,
     max_duration_sec: float | None = None,
 ) -> None:
-    """Replace video audio track with audio_path; write to out_path.
+    """Replace video audio with audio_tracks [(audio_path, lang), ...]; write to out_path.
+    Each track becomes its own audio stream tagged with its language; the first is default.
     If max_duration_sec is set, output is trimmed to that length (for testing cap)."""
-    cmd = [
-        "ffmpeg", "-y",
-        "-i", video_path,
-        "-i", audio_path,
-        "-c:v", "copy",
-        "-map", "0:v:0",
-        "-map", "1:a:0",
-        "-shortest",
-    ]
+    cmd = ["ffmpeg", "-y", "-i", video_path]
+    for audio_path, _ in audio_tracks:
+        cmd.extend(["-i", audio_path])
+    cmd.extend(["-c:v", "copy", "-map", "0:v:0"])
+    for k, (_, lang) in enumerate(audio_tracks):
+        cmd.extend([
+            "-map", f"{k + 1}:a:0",
+            f"-metadata:s:a:{k}", f"language={LANG_ISO639_2.get(lang.split('-')[0].lower(), 'und')}",
+            f"-metadata:s:a:{k}", f"title={lang}",
+            f"-disposition:a:{k}", "default" if k == 0 else "0",
+        ])
+    cmd.append("-shortest")
     if max_duration_sec is not None and max_duration_sec > 0:
         cmd.extend(["-t", str(max_duration_sec)])
     cmd.append(out_path)
     subprocess.run(cmd, capture_output=True, check=True)
 
 
-def run_tts_and_replace(
+def _effective_duration(video_duration: float) -> float:
+    """Video duration, capped by VIDEO_CAP_SEC if set."""
+    raw = os.environ.get(VIDEO_CAP_SEC_ENV, "").strip()
+    cap_sec = None
+    if raw:
+        try:
+            cap_sec = float(raw)
+        except ValueError:
+            pass
+    return min(video_duration, cap_sec) if cap_sec and cap_sec > 0 else video_duration
+
+
+def _load_checkpoint(path: Path, job: dict) -> dict | None:
+    """Checkpoint manifest for this track if it matches job (same SRT, duration, backend,
+    voice and rate control setting)."""
+    if not path.exists():
+        return None
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if any(manifest.get(k) != v for k, v in job.items()):
+        return None
+    return manifest
+
+
+def _save_checkpoint(path: Path, manifest: dict) -> None:
+    """Write manifest atomically so a crash never leaves a half-written checkpoint."""
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _synthesize_block(
+    text: str, block_path: Path, prefix: str, backend: TTSBackend, voice: str, rate: float = 1.0
+) -> None:
+    """TTS a block to block_path. Long text is chunked, synthesized and concatenated."""
+    text_chunks = _chunk_text(text)
+    if len(text_chunks) == 1:
+        _generate_tts(text, str(block_path), backend, voice, rate)
+        return
+    chunk_paths = [f"{prefix}_tts_c{j}.mp3" for j in range(len(text_chunks))]
+    for chunk, cp in zip(text_chunks, chunk_paths):
+        _generate_tts(chunk, cp, backend, voice, rate)
+    _concat_audio(chunk_paths, str(block_path))
+    for cp in chunk_paths:
+        Path(cp).unlink(missing_ok=True)
+
+
+def _render_tts_track(
     srt_path: str,
+    tts_out: Path,
+    tmp_base: Path,
+    effective_duration: float,
+    backend: TTSBackend,
+    voice: str,
+    on_progress,
+) -> dict:
+    """Render one language track: group cues into speech blocks, TTS each block as one at a
+    speaking rate chosen to fit the block's time span, write it into a PCM timeline with
+    zero-sample gaps. Stretch and trim only if block would still overlap next block.
+    Temp files are prefixed with tmp_base.
+    After every block the timeline and {tmp_base}_manifest.json are checkpointed, so a rerun
+    after a crash continues from the last completed block.
+    on_progress(phase, percent) is called as blocks complete. Block positions go to
+    {tmp_base}_blocks.jsonl and the onset-based drift report to {tmp_base}_sync.json.
+    Returns fit and sync stats (synth_passes, stretched_blocks, trimmed_blocks, trimmed_sec,
+    baseline_trimmed_blocks, baseline_trimmed_sec, max_abs_drift_ms, drift_trend_ms); the
+    baseline_* figures are what the atempo-only fit (rate 1.0, speed-up capped at MAX_ATEMPO,
+    then trim) would have cut, for comparison with rate control."""
+    on_progress("Parsing SRT...", 0)
+    # Blocks are streamed from the SRT (twice: once to count them for progress); nothing
+    # proportional to the video's length is held in memory
+    n = sum(1 for _ in _iter_track_blocks(srt_path, effective_duration))
+    if n == 0:
+        if next(_iter_srt_cues(srt_path), None) is None:
+            raise ValueError("SRT has no cues")
+        raise ValueError("No cues within cap duration")
+    prefix = str(tmp_base)
+    block_path = Path(f"{prefix}_tts_block.mp3")
+    block_wav = Path(f"{prefix}_tts_block.wav")
+    block_stretched_wav = Path(f"{prefix}_tts_block_str.wav")
+    # Intended vs placed position of every block, for the sync report
+    blocks_log_path = Path(f"{prefix}_blocks.jsonl")
+    sync_report_path = Path(f"{prefix}_sync.json")
+    manifest_path = Path(f"{prefix}_manifest.json")
+    min_block_sec = 0.2
+    rate_ctl = _RateController() if _rate_control_enabled() else None
+    stats = {"synth_passes": 0, "stretched_blocks": 0, "trimmed_blocks": 0, "trimmed_sec": 0.0}
+    # Before/after: what the atempo-only fit would have trimmed
+    stats.update(baseline_trimmed_blocks=0, baseline_trimmed_sec=0.0)
+    end_sample = round(effective_duration * SAMPLE_RATE)
+
+    # Resume from the last completed block if a previous run of this track was interrupted
+    job = {
+        "srt_path": str(srt_path),
+        "effective_duration": effective_duration,
+        "backend": backend.name,
+        "voice": voice,
+        "rate_control": rate_ctl is not None,
+        "blocks": n,
+    }
+    manifest = _load_checkpoint(manifest_path, job) if tts_out.exists() else None
+    if manifest and manifest.get("done") and sync_report_path.exists():
+        on_progress(f"TTS block {n}/{n} (already rendered)", 100)
+        return manifest["stats"]
+    first_block = 0
+    if manifest and blocks_log_path.exists():
+        first_block = manifest["completed_blocks"]
+        stats.update(manifest["stats"])
+        if rate_ctl is not None and manifest.get("chars_per_sec"):
+            # Restore the estimate and its weighting so resumed blocks get the same rates
+            rate_ctl.chars_per_sec = manifest["chars_per_sec"]
+            rate_ctl._samples = manifest.get("rate_samples", 0)
+        # Timeline position is in samples, so gaps land exactly on each block's start
+        timeline = _WavTimeline(tts_out, resume_samples=manifest["timeline_samples"])
+        blocks_log = open(blocks_log_path, "r+", encoding="utf-8")
+        blocks_log.truncate(manifest["blocks_log_bytes"])
+        blocks_log.seek(manifest["blocks_log_bytes"])
+        logger.info("Resuming %s at block %d/%d", tts_out.name, min(first_block + 1, n), n)
+    else:
+        timeline = _WavTimeline(tts_out)
+        blocks_log = open(blocks_log_path, "w", encoding="utf-8")
+
+    try:
+        for i, (block_start, block_end, text, next_block_start) in enumerate(
+            _iter_track_blocks(srt_path, effective_duration)
+        ):
+            if i < first_block:
+                continue
+            on_progress(f"TTS block {i + 1}/{n}...", 100 * (i + 0.5) / n)
+            block_started = time.perf_counter()
+            block_duration = max(min_block_sec, block_end - block_start)
+            start_sample = round(block_start * SAMPLE_RATE)
+            max_samples = round(next_block_start * SAMPLE_RATE) - start_sample
+            max_duration = max_samples / SAMPLE_RATE
+            if rate_ctl is not None:
+                rate = rate_ctl.initial_rate(text, block_duration)
+                for _ in range(rate_ctl.max_passes):
+                    _synthesize_block(text, block_path, prefix, backend, voice, rate)
+                    stats["synth_passes"] += 1
+                    current = _decode_pcm(str(block_path), str(block_wav)) / SAMPLE_RATE
+                    rate_ctl.observe(text, rate, current)
+                    new_rate = rate_ctl.next_rate(rate, current, block_duration)
+                    if new_rate is None:
+                        break
+                    rate = new_rate
+                # Stretch only when speech would still run into the next block
+                fitted_wav = block_wav
+                if current > max_duration:
+                    _stretch_audio(str(block_wav), str(block_stretched_wav), max_duration, current_sec=current)
+                    stats["stretched_blocks"] += 1
+                    fitted_wav = block_stretched_wav
+            else:
+                rate = 1.0
+                _synthesize_block(text, block_path, prefix, backend, voice)
+                stats["synth_passes"] += 1
+                current = _decode_pcm(str(block_path), str(block_wav)) / SAMPLE_RATE
+                _stretch_audio(str(block_wav), str(block_stretched_wav), block_duration, current_sec=current)
+                stats["stretched_blocks"] += 1
+                fitted_wav = block_stretched_wav
+            # Atempo-only fit: speech at rate 1.0 (duration scales with 1/rate) sped up toward
+            # the block's span by at most MAX_ATEMPO, then trimmed at the next block
+            natural_sec = current * rate
+            speedup = max(1.0, min(natural_sec / block_duration, MAX_ATEMPO))
+            baseline_samples = round(natural_sec / speedup * SAMPLE_RATE)
+            if baseline_samples > max_samples:
+                stats["baseline_trimmed_blocks"] += 1
+                stats["baseline_trimmed_sec"] += (baseline_samples - max_samples) / SAMPLE_RATE
+            # Gap from actual end of previous content to this block start, in samples
+            timeline.write_silence(start_sample - timeline.position)
+            placed_sample = timeline.position
+            # Trim in place: copy at most up to the next block's start
+            with wave.open(str(fitted_wav), "rb") as w:
+                fitted_samples = w.getnframes()
+            written = timeline.append_wav(str(fitted_wav), max_samples)
+            blocks_log.write(json.dumps({
+                "index": i,
+                "start_sample": start_sample,
+                "placed_sample": placed_sample,
+                "samples": written,
+            }) + "\n")
+            if fitted_samples > max_samples:
+                stats["trimmed_blocks"] += 1
+                stats["trimmed_sec"] += (fitted_samples - max_samples) / SAMPLE_RATE
+            # Checkpoint: block audio is in the timeline; record how far it (and the log) got
+            timeline.flush()
+            blocks_log.flush()
+            _save_checkpoint(manifest_path, {
+                **job,
+                "completed_blocks": i + 1,
+                "timeline_samples": timeline.position,
+                "timeline_end_sec": timeline.position / SAMPLE_RATE,
+                "blocks_log_bytes": blocks_log.tell(),
+                "chars_per_sec": rate_ctl.chars_per_sec if rate_ctl is not None else None,
+                "rate_samples": rate_ctl._samples if rate_ctl is not None else 0,
+                "stats": stats,
+            })
+            metrics.observe("tts.block", time.perf_counter() - block_started)
+            metrics.inc("tts.blocks")
+            on_progress(f"TTS block {i + 1}/{n}...", 100 * (i + 1) / n)
+
+        if end_sample > timeline.position:
+            on_progress("Finalizing timeline...", 100)
+            timeline.write_silence(end_sample - timeline.position)
+    finally:
+        timeline.close()
+        blocks_log.close()
+        for p in (block_path, block_wav, block_stretched_wav):
+            p.unlink(missing_ok=True)
+    on_progress("Checking sync...", 100)
+    report = drift_report(str(tts_out), iter_block_starts(str(blocks_log_path)))
+    sync_report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    stats["max_abs_drift_ms"] = report["max_abs_drift_ms"]
+    stats["drift_trend_ms"] = report["trend_ms"]
+    _save_checkpoint(manifest_path, {
+        **job,
+        "done": True,
+        "completed_blocks": n,
+        "timeline_samples": end_sample,
+        # A rerun that finds no sync report resumes past every block and only re-checks sync
+        "blocks_log_bytes": blocks_log_path.stat().st_size,
+        "stats": stats,
+    })
+    logger.info(
+        "TTS track %s: %d blocks, %d synth passes, %d stretched, %d trimmed (%.2fs; %d blocks / %.2fs "
+        "with atempo-only fitting), rate control %s, sync max %s ms / trend %s ms (%d/%d onsets matched)",
+        tts_out.name, n, stats["synth_passes"], stats["stretched_blocks"], stats["trimmed_blocks"],
+        stats["trimmed_sec"], stats["baseline_trimmed_blocks"], stats["baseline_trimmed_sec"],
+        "on" if rate_ctl is not None else "off",
+        report["max_abs_drift_ms"], report["trend_ms"], report["matched"], report["blocks"],
+    )
+    return stats
+
+
+def run_multi_tts_and_replace(
+    tracks: list[tuple[str, str, str | None]],
     video_path: str,
     out_dir: str,
     progress_state: dict | None = None,
+    backend: TTSBackend | None = None,
 ) -> str:
     """
-    TTS from SRT: group cues into speech blocks, TTS each block as one, stretch
-    block TTS to match block time span (first seg start to last seg end), place
-    with silence gaps. Trim only if block would overlap next block.
-    Returns path to the dubbed video.
+    Dub one video into several languages. tracks is [(lang, srt_path, voice or None), ...].
+    Each track is rendered in parallel from the same download and muxed as its own audio
+    stream (first track is the default). Returns path to the dubbed video.
     """
-    def _set_phase(msg: str) -> None:
-        if progress_state is not None:
-            progress_state["tts_phase"] = msg
-
-    def _set_percent(pct: float) -> None:
-        if progress_state is not None:
-            progress_state["tts_percent"] = min(100.0, max(0.0, pct))
-
+    if not tracks:
+        raise ValueError("No tracks to render")
+    backend = backend or get_backend()
     out_dir = Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
     video_path = Path(video_path)
     base = video_path.stem
-    tts_raw = out_dir / f"{base}_tts_raw.mp3"
     dubbed = out_dir / f"{base}_dubbed.mp4"
+    # Per-track artifacts live in their own directory so they never look like the download
+    work_dir = out_dir / f"{base}_tracks"
+    work_dir.mkdir(exist_ok=True)
     video_duration = _duration_seconds(str(video_path))
-    cap_sec = None
-    raw = os.environ.get(VIDEO_CAP_SEC_ENV, "").strip()
-    if raw:
-        try:
-            cap_sec = float(raw)
-        except ValueError:
-            pass
-    effective_duration = min(video_duration, cap_sec) if cap_sec and cap_sec > 0 else video_duration
-
-    _set_phase("Parsing SRT...")
-    _set_percent(0)
-    cues = _parse_srt_cues(srt_path)
-    if not cues:
-        raise ValueError("SRT has no cues")
-    if effective_duration < video_duration:
-        cues = [c for c in cues if c[0] < effective_duration]
-        if not cues:
-            raise ValueError("No cues within cap duration")
-    blocks = _group_cues_into_blocks(cues)
-    n = len(blocks)
-    merged_path = out_dir / f"{base}_tts_merged.mp3"
-    block_path = out_dir / f"{base}_tts_block.mp3"
-    block_stretched_path = out_dir / f"{base}_tts_block_str.mp3"
-    block_trimmed_path = out_dir / f"{base}_tts_block_trim.mp3"
-    silence_path = out_dir / f"{base}_tts_silence.mp3"
-    tmp_merged_path = out_dir / f"{base}_tts_merged_tmp.mp3"
-    min_block_sec = 0.2
-    # Track where the timeline actually ends after each block (so next gap is correct when we trim)
-    timeline_end_sec = 0.0
-
-    for i, (block_start, block_end, text) in enumerate(blocks):
-        _set_phase(f"TTS block {i + 1}/{n}...")
-        _set_percent(100 * (i + 0.5) / n)
-        block_duration = max(min_block_sec, block_end - block_start)
-        # Long block text: chunk and concat TTS, then stretch whole block to fit
-        text_chunks = _chunk_text(text)
-        if len(text_chunks) == 1:
-            _generate_tts(text, str(block_path))
-        else:
-            for j, chunk in enumerate(text_chunks):
-                cp = out_dir / f"{base}_tts_c{j}.mp3"
-                _generate_tts(chunk, str(cp))
-            _concat_audio([str(out_dir / f"{base}_tts_c{k}.mp3") for k in range(len(text_chunks))], str(block_path))
-            for k in range(len(text_chunks)):
-                (out_dir / f"{base}_tts_c{k}.mp3").unlink(missing_ok=True)
-        _stretch_audio(str(block_path), str(block_stretched_path), block_duration)
-        next_block_start = blocks[i + 1][0] if i < n - 1 else effective_duration
-        max_duration = next_block_start - block_start
-        _trim_audio(str(block_stretched_path), str(block_trimmed_path), max_duration)
-        # Gap from actual end of previous content to this block start (avoids next block starting late)
-        gap_before = block_start - timeline_end_sec
-        to_concat = []
-        if gap_before > 0.01:
-            _create_silence(gap_before, str(silence_path))
-            to_concat.append(str(silence_path))
-        to_concat.append(str(block_trimmed_path))
-        if i == 0:
-            _concat_audio(to_concat, str(merged_path))
-        else:
-            _concat_audio([str(merged_path)] + to_concat, str(tmp_merged_path))
-            merged_path.unlink(missing_ok=True)
-            tmp_merged_path.rename(merged_path)
-        segment_duration = _duration_seconds(str(block_trimmed_path))
-        timeline_end_sec = block_start + segment_duration
-        block_path.unlink(missing_ok=True)
-        block_stretched_path.unlink(missing_ok=True)
-        block_trimmed_path.unlink(missing_ok=True)
-        _set_percent(100 * (i + 1) / n)
-
-    trail = effective_duration - timeline_end_sec
-    if trail > 0.01:
-        _set_phase("Finalizing timeline...")
-        _create_silence(trail, str(silence_path))
-        _concat_audio([str(merged_path), str(silence_path)], str(tmp_merged_path))
-        merged_path.unlink(missing_ok=True)
-        tmp_merged_path.rename(merged_path)
-    silence_path.unlink(missing_ok=True)
-    merged_path.rename(tts_raw)
-
-    _set_phase("Replacing video audio...")
-    _set_percent(98)
-    _replace_video_audio(
-        str(video_path),
-        str(tts_raw),
-        str(dubbed),
-        max_duration_sec=effective_duration if effective_duration < video_duration else None,
-    )
-    _set_percent(100)
+    effective_duration = _effective_duration(video_duration)
+
+    lock = threading.Lock()
+    track_progress = {lang: ("...", 0.0) for lang, _, _ in tracks}
+
+    def _progress_for(lang: str):
+        def on_progress(phase: str, pct: float) -> None:
+            with lock:
+                track_progress[lang] = (phase, pct)
+                if progress_state is None:
+                    return
+                if len(tracks) == 1:
+                    progress_state["tts_phase"] = phase
+                else:
+                    progress_state["tts_phase"] = "; ".join(f"{k}: {p}" for k, (p, _) in track_progress.items())
+                overall = sum(p for _, p in track_progress.values()) / len(track_progress)
+                progress_state["tts_percent"] = min(100.0, max(0.0, overall))
+        return on_progress
+
+    def _render(track: tuple[str, str, str | None]) -> tuple[str, dict]:
+        lang, srt_path, voice = track
+        tts_out = work_dir / f"{lang}_tts_raw.wav"
+        stats = _render_tts_track(
+            srt_path,
+            tts_out,
+            work_dir / lang,
+            effective_duration,
+            backend,
+            voice or backend.default_voice(lang),
+            _progress_for(lang),
+        )
+        return str(tts_out), stats
+
+    with ThreadPoolExecutor(max_workers=len(tracks)) as pool:
+        results = list(pool.map(_render, tracks))
+    rendered = [path for path, _ in results]
+    if progress_state is not None:
+        progress_state["tts_stats"] = {lang: stats for (lang, _, _), (_, stats) in zip(tracks, results)}
+
+    if progress_state is not None:
+        progress_state["tts_phase"] = "Replacing video audio..."
+        progress_state["tts_percent"] = 98
+    with metrics.timer("mux"):
+        _replace_video_audio(
+            str(video_path),
+            [(path, lang) for path, (lang, _, _) in zip(rendered, tracks)],
+            str(dubbed),
+            max_duration_sec=effective_duration if effective_duration < video_duration else None,
+        )
+    metrics.event("video_minutes_dubbed", effective_duration / 60)
+    # Job finished: drop the track audio and checkpoints (a new request for this video
+    # renders fresh); only the small per-track sync report is kept
+    for path, (lang, _, _) in zip(rendered, tracks):
+        Path(path).unlink(missing_ok=True)
+        (work_dir / f"{lang}_blocks.jsonl").unlink(missing_ok=True)
+        (work_dir / f"{lang}_manifest.json").unlink(missing_ok=True)
+    if progress_state is not None:
+        progress_state["tts_percent"] = 100
 
     return str(dubbed)
+
+
+def run_tts_and_replace(
+    srt_path: str,
+    video_path: str,
+    out_dir: str,
+    progress_state: dict | None = None,
+    lang: str = "en",
+    voice: str | None = None,
+    backend: TTSBackend | None = None,
+) -> str:
+    """Single-language dub: TTS from SRT, replace video audio. Returns path to the dubbed video."""
+    return run_multi_tts_and_replace(
+        [(lang, srt_path, voice)], video_path, out_dir, progress_state, backend
+    )
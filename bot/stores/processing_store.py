@@ -22,18 +22,30 @@ def _save(jobs: list[dict]) -> None:
         json.dump(jobs, f)
 
 
-def add(chat_id: int, user_id: int, url: str) -> None:
+def add(chat_id: int, user_id: int, url: str, tracks: list[tuple[str, str | None]] | None = None) -> None:
+    """tracks: [(lang, voice or None), ...] requested for the job."""
     jobs = _load()
-    jobs.append({"chat_id": chat_id, "user_id": user_id, "url": url})
+    job = {"chat_id": chat_id, "user_id": user_id, "url": url}
+    if tracks:
+        job["tracks"] = [list(t) for t in tracks]
+    jobs.append(job)
     _save(jobs)
 
 
-def update_paths(chat_id: int, url: str, video_path: str, srt_path: str | None) -> None:
+def update_paths(
+    chat_id: int,
+    url: str,
+    video_path: str,
+    srt_path: str | None,
+    srt_paths: dict[str, str] | None = None,
+) -> None:
     jobs = _load()
     for j in jobs:
         if j["chat_id"] == chat_id and j["url"] == url:
             j["video_path"] = video_path
             j["srt_path"] = srt_path
+            if srt_paths is not None:
+                j["srt_paths"] = srt_paths
             break
     _save(jobs)
 
@@ -52,3 +64,7 @@ def remove(chat_id: int, url: str) -> None:
 
 def get_by_user(user_id: int) -> list[dict]:
     return [j for j in _load() if j["user_id"] == user_id]
+
+
+def get_all() -> list[dict]:
+    return _load()
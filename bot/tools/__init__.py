@@ -0,0 +1 @@
+"""Developer tools (benchmarks, checks). Run with python -m bot.tools.<name>."""
@@ -0,0 +1,64 @@
+"""Startup import-time benchmark: python -m bot.tools.importtime [--runs N] [--budget PATH].
+
+Runs `python -X importtime -c "import bot.__main__"` in fresh interpreters, reports the
+slowest imports and fails (exit 1) if the best cumulative time exceeds the budget or a
+module that should load lazily (see importtime_budget.json) is imported at startup.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+DEFAULT_BUDGET = Path(__file__).with_name("importtime_budget.json")
+
+
+def _measure(module: str) -> dict[str, int]:
+    """Return {module_name: cumulative_us} for one fresh-interpreter import of module."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line.split(":", 1)[1].split("|"))
+        if cumulative.isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters to try (best is kept)")
+    parser.add_argument("--budget", type=Path, default=DEFAULT_BUDGET)
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to print")
+    args = parser.parse_args()
+
+    budget = json.loads(args.budget.read_text(encoding="utf-8"))
+    module = budget["module"]
+    runs = [_measure(module) for _ in range(max(1, args.runs))]
+    best = min(runs, key=lambda t: t.get(module, 0))
+    total = best.get(module, 0)
+
+    print(f"{module}: {total / 1000:.1f} ms cumulative (best of {len(runs)}, budget {budget['max_cumulative_us'] / 1000:.0f} ms)")
+    for name, us in sorted(best.items(), key=lambda kv: -kv[1])[: args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if total > budget["max_cumulative_us"]:
+        failures.append(f"startup import time {total / 1000:.1f} ms over budget")
+    eager = [m for m in budget.get("forbidden", []) if m in best]
+    if eager:
+        failures.append(f"imported at startup (should be lazy): {', '.join(eager)}")
+    for f in failures:
+        print(f"FAIL: {f}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
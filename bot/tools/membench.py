@@ -0,0 +1,123 @@
+"""Memory benchmark for the cue -> block -> audio path: python -m bot.tools.membench.
+
+Renders synthetic SRTs of 10 min, 1 h and 6 h (a cue every ~1.4 s) through the pipeline's
+track renderer, each in a fresh interpreter, and reports tracemalloc peak and peak RSS.
+TTS and ffmpeg decoding are replaced by an in-process tone so only the pipeline's own memory
+is measured. Fails (exit 1) if the longest input's tracemalloc peak exceeds the shortest's by
+more than --max-growth.
+"""
+
+import argparse
+import array
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+import wave
+from pathlib import Path
+
+from bot.pipelines import tts_pipeline
+from bot.pipelines.tts_backends import FakeBackend
+
+DURATIONS = {"10min": 600, "1h": 3600, "6h": 6 * 3600}
+WORDS = "the quick brown fox jumps over a lazy dog while we dub this long stream".split()
+
+
+def _srt_time(sec: float) -> str:
+    ms = round(sec * 1000)
+    return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d},{ms % 1000:03d}"
+
+
+def _write_srt(path: Path, duration_sec: int, seed: int = 1) -> int:
+    rng = random.Random(seed)
+    t = 0.5
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while t < duration_sec - 2:
+            length = rng.uniform(0.8, 1.8)
+            count += 1
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 8)))
+            f.write(f"{count}\n{_srt_time(t)} --> {_srt_time(t + length)}\n{text}\n\n")
+            # Mostly back-to-back cues with an occasional pause between sentences
+            t += length + (rng.uniform(1.0, 3.0) if rng.random() < 0.2 else 0.05)
+    return count
+
+
+def _stub_synthesize_block(text, block_path, prefix, backend, voice, rate=1.0) -> None:
+    Path(block_path).write_text(str(len(text) / (15.0 * rate)), encoding="utf-8")
+
+
+def _stub_decode_pcm(audio_path: str, out_path: str) -> int:
+    n = round(float(Path(audio_path).read_text(encoding="utf-8")) * tts_pipeline.SAMPLE_RATE)
+    with wave.open(out_path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(tts_pipeline.SAMPLE_WIDTH)
+        w.setframerate(tts_pipeline.SAMPLE_RATE)
+        w.writeframes(array.array("h", [4000]).tobytes() * n)
+    return n
+
+
+def _stub_stretch_audio(audio_path, out_path, target_duration_sec, max_atempo=1.2, current_sec=None) -> None:
+    Path(out_path).write_bytes(Path(audio_path).read_bytes())
+
+
+def _install_stubs() -> None:
+    """Replace TTS, decoding and atempo with in-process stand-ins (also used by sync_check)."""
+    tts_pipeline._synthesize_block = _stub_synthesize_block
+    tts_pipeline._decode_pcm = _stub_decode_pcm
+    tts_pipeline._stretch_audio = _stub_stretch_audio
+
+
+def _run_one(duration_sec: int) -> dict:
+    _install_stubs()
+    with tempfile.TemporaryDirectory() as tmp:
+        srt = Path(tmp) / "bench.srt"
+        cues = _write_srt(srt, duration_sec)
+        tracemalloc.start()
+        stats = tts_pipeline._render_tts_track(
+            str(srt), Path(tmp) / "bench.wav", Path(tmp) / "bench", float(duration_sec),
+            FakeBackend(), "bench", lambda phase, pct: None,
+        )
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "duration_sec": duration_sec,
+        "cues": cues,
+        "tracemalloc_peak_kb": round(peak / 1024),
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "max_abs_drift_ms": stats["max_abs_drift_ms"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pipeline memory benchmark")
+    parser.add_argument("--one", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--durations", default=",".join(DURATIONS), help="comma list of " + ", ".join(DURATIONS))
+    parser.add_argument("--max-growth", type=float, default=1.5, help="allowed peak ratio longest/shortest")
+    args = parser.parse_args()
+
+    if args.one:
+        print(json.dumps(_run_one(args.one)))
+        return
+
+    results = {}
+    for name in args.durations.split(","):
+        out = subprocess.run(
+            [sys.executable, "-m", "bot.tools.membench", "--one", str(DURATIONS[name])],
+            capture_output=True, text=True, check=True,
+        )
+        results[name] = json.loads(out.stdout.strip().splitlines()[-1])
+        r = results[name]
+        print(f"{name:>6}: {r['cues']:6d} cues, tracemalloc peak {r['tracemalloc_peak_kb']:6d} KiB, "
+              f"max RSS {r['max_rss_kb'] // 1024} MiB")
+    peaks = [r["tracemalloc_peak_kb"] for r in results.values()]
+    growth = max(peaks) / max(1, min(peaks))
+    print(f"peak growth {growth:.2f}x (limit {args.max_growth}x)")
+    sys.exit(0 if growth <= args.max_growth else 1)
+
+
+if __name__ == "__main__":
+    main()
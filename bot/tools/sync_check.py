@@ -0,0 +1,85 @@
+"""Dub sync drift report.
+
+  python -m bot.tools.sync_check AUDIO --blocks BLOCKS.jsonl [--max-drift-ms MS]
+      Compare block onsets in AUDIO (a track's <lang>_tts_raw.wav, or a dubbed video,
+      which is decoded first) with the intended starts in its <lang>_blocks.jsonl. Both are
+      in downloads/<id>_tracks/ while a job runs and are removed once its video is muxed.
+  python -m bot.tools.sync_check --synthetic-hours 2
+      Render a synthetic SRT (irregular cues at millisecond timestamps) through the
+      pipeline's track renderer, with TTS and decoding stubbed as in membench, and check
+      the drift it reports stays within one sample.
+
+Prints the report as JSON; exits 1 if max drift exceeds the bound.
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from bot.pipelines import tts_pipeline
+from bot.pipelines.sync_check import drift_report, iter_block_starts
+from bot.pipelines.tts_backends import SAMPLE_RATE, FakeBackend
+from bot.tools.membench import _install_stubs, _write_srt
+
+
+def _synthetic_report(hours: float, seed: int) -> dict:
+    _install_stubs()
+    duration_sec = round(hours * 3600)
+    with tempfile.TemporaryDirectory() as tmp:
+        srt = Path(tmp) / "synthetic.srt"
+        _write_srt(srt, duration_sec, seed)
+        tts_pipeline._render_tts_track(
+            str(srt), Path(tmp) / "synthetic.wav", Path(tmp) / "synthetic", float(duration_sec),
+            FakeBackend(), "synthetic", lambda phase, pct: None,
+        )
+        # The pipeline's own report, from the positions it logged for each block
+        report = json.loads((Path(tmp) / "synthetic_sync.json").read_text(encoding="utf-8"))
+        # Blocks whose predecessor's speech runs up to them have no detectable onset
+        min_gap = round(0.03 * SAMPLE_RATE)
+        abutting = 0
+        prev_end = None
+        with open(Path(tmp) / "synthetic_blocks.jsonl", encoding="utf-8") as f:
+            for line in f:
+                block = json.loads(line)
+                if prev_end is not None and block["start_sample"] - prev_end < min_gap:
+                    abutting += 1
+                prev_end = block["placed_sample"] + block["samples"]
+    report["abutting"] = abutting
+    report["duration_hours"] = hours
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Dub sync drift report")
+    parser.add_argument("audio", nargs="?", help="rendered track (wav) or dubbed video")
+    parser.add_argument("--blocks", help="pipeline *_blocks.jsonl for AUDIO")
+    parser.add_argument("--synthetic-hours", type=float, help="check a synthetic timeline instead")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-drift-ms", type=float, help="fail above this (default: 1 sample for synthetic)")
+    args = parser.parse_args()
+
+    if args.synthetic_hours:
+        report = _synthetic_report(args.synthetic_hours, args.seed)
+        bound = args.max_drift_ms if args.max_drift_ms is not None else 1000 / SAMPLE_RATE
+        ok = report["missed"] <= report["abutting"]
+    else:
+        if not args.audio or not args.blocks:
+            parser.error("AUDIO and --blocks are required (or use --synthetic-hours)")
+        bound = args.max_drift_ms
+        ok = True
+        with tempfile.TemporaryDirectory() as tmp:
+            wav = args.audio
+            if not wav.endswith(".wav"):
+                wav = str(Path(tmp) / "decoded.wav")
+                tts_pipeline._decode_pcm(args.audio, wav)
+            report = drift_report(wav, iter_block_starts(args.blocks))
+    print(json.dumps(report, indent=2))
+    if bound is not None and report["max_abs_drift_ms"] is not None:
+        ok = ok and report["max_abs_drift_ms"] <= bound
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
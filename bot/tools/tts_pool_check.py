@@ -0,0 +1,134 @@
+"""TTS connection pool check against a local websocket stand-in: python -m bot.tools.tts_pool_check.
+
+Starts a local server that speaks the Edge TTS message framing (turn.start, binary audio
+frames, turn.end), counts websocket handshakes and adds --handshake-ms of delay to each to
+mimic TLS setup. Then runs requests through TTSPool:
+  sequential    one thread, pool of 2            -> expect 1 handshake
+  concurrent    4 threads, pool of 2             -> expect <= 2 handshakes
+  server drops  server closes every 10 requests  -> all requests succeed after reconnects
+  timeout       first request stalls past its timeout -> cancelled, later requests get their own audio
+  no reuse      max_requests=1 (per-request connect, like edge_tts.Communicate) for comparison
+Exits 1 if any expectation fails.
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import WSMsgType, web
+
+from bot.pipelines.tts_client import TTSPool
+
+
+class _StandInServer:
+    def __init__(self, handshake_ms: float) -> None:
+        self.handshake_ms = handshake_ms
+        self.handshakes = 0
+        self.drop_every = 0
+        self.stall_sec = 0.0
+        self.port = None
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True, name="ws-standin").start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+
+    async def _start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/tts", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+        await asyncio.sleep(self.handshake_ms / 1000)
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.handshakes += 1
+        served = 0
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT or "Path:ssml" not in msg.data.split("\r\n\r\n", 1)[0]:
+                continue
+            request_id = msg.data.split("X-RequestId:", 1)[1].split("\r\n", 1)[0]
+            text = msg.data.split("</prosody>", 1)[0].rsplit(">", 1)[-1]
+            await ws.send_str(f"X-RequestId:{request_id}\r\nPath:turn.start\r\n\r\n{{}}")
+            await asyncio.sleep(self.stall_sec)
+            header = f"X-RequestId:{request_id}\r\nContent-Type:audio/mpeg\r\nPath:audio\r\n".encode()
+            try:
+                await ws.send_bytes(len(header).to_bytes(2, "big") + header + b"MP3:" + text.encode())
+                await ws.send_str(f"X-RequestId:{request_id}\r\nPath:turn.end\r\n\r\n{{}}")
+            except ConnectionResetError:
+                # Client gave up on a stalled request and closed the socket
+                break
+            served += 1
+            if self.drop_every and served % self.drop_every == 0:
+                await ws.close()
+        return ws
+
+    def endpoint(self) -> tuple[str, dict]:
+        return f"http://127.0.0.1:{self.port}/tts", {}
+
+
+def _run(server: _StandInServer, pool: TTSPool, requests: int, threads: int) -> tuple[int, float, bool]:
+    server.handshakes = 0
+    texts = [f"block {i}" for i in range(requests)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        results = list(ex.map(lambda t: pool.synthesize(t, "en-US-GuyNeural"), texts))
+    elapsed = time.perf_counter() - started
+    pool.close()
+    ok = all(r == b"MP3:" + t.encode() for r, t in zip(results, texts))
+    return server.handshakes, elapsed, ok
+
+
+def _run_timeout(server: _StandInServer, requests: int) -> tuple[int, float, bool]:
+    server.handshakes = 0
+    pool = TTSPool(1, server.endpoint)
+    server.stall_sec = 3.0
+    try:
+        pool.synthesize("stalled", "en-US-GuyNeural", timeout=0.2)
+        timed_out = False
+    except TimeoutError:
+        timed_out = True
+    server.stall_sec = 0.0
+    handshakes, elapsed, ok = _run(server, pool, requests, 1)
+    # Had the stalled request kept the only connection, the rest would wait out the stall
+    return handshakes, elapsed, ok and timed_out and elapsed < 1.5
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="TTS pool check against a local stand-in")
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--handshake-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    server = _StandInServer(args.handshake_ms)
+    n = args.requests
+    failures = []
+
+    def check(name: str, result: tuple[int, float, bool], max_handshakes: int | None) -> None:
+        handshakes, elapsed, ok = result
+        print(f"{name:>12}: {n} requests, {handshakes:3d} handshakes, {1000 * elapsed / n:6.1f} ms/request")
+        if not ok:
+            failures.append(f"{name}: wrong audio returned")
+        if max_handshakes is not None and handshakes > max_handshakes:
+            failures.append(f"{name}: {handshakes} handshakes (expected <= {max_handshakes})")
+
+    check("sequential", _run(server, TTSPool(2, server.endpoint), n, 1), 1)
+    check("concurrent", _run(server, TTSPool(2, server.endpoint), n, 4), 2)
+    server.drop_every = 10
+    check("server drops", _run(server, TTSPool(2, server.endpoint), n, 1), n // 10 + 1)
+    server.drop_every = 0
+    check("timeout", _run_timeout(server, n), 2)
+    check("no reuse", _run(server, TTSPool(2, server.endpoint, max_requests=1), n, 1), None)
+
+    for f in failures:
+        print(f"FAIL: {f}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()